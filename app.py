@@ -5,30 +5,68 @@ Flask-based server for deployment
 """
 
 import os
+import gzip
 import json
 import sqlite3
 import hashlib
 import secrets
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 from pathlib import Path
+from catalog_cache import get_cached, connect_catalog, catalog_uri
+from study_plan import build_plan_index, build_plan
+from suggest import build_suggest_index
+from prerender import build_page_cache, page_etag
+from practice import DEFAULT_SET_SIZE, build_practice_index, solved_problem_ids
+from consolidated import window_bit
+from columnar import build_columnar_encoder
+from topic_analytics import topic_analytics, DEFAULT_LIMIT as TOPIC_LIMIT, MAX_LIMIT as MAX_TOPIC_LIMIT
+from progress import load_progress, save_progress
+from review import due_reviews, record_review
+from leaderboard import build_leaderboards, leaderboard_response
+from filter_engine import filter_engine_enabled, build_filter_engine, escape_like
+from export import EXPORT_FORMATS, iter_export, gzip_stream, accepts_gzip
+from write_behind import WriteBehindQueue, WriteQueueFull
+from profiling import Profiler
+from rate_limit import RateLimiter, ConcurrencyCap, ServerBusy, endpoint_class, batch_cost, client_ip, retry_after_header
 
 app = Flask(__name__, static_folder='.')
 
-# Database configuration
+# Database configuration: read-only problem catalog, read-write (WAL) user data
 DB_PATH = os.path.join(os.getcwd(), 'dsa_problems.db')
+USER_DB_PATH = os.environ.get('DSA_USER_DB', os.path.join(os.getcwd(), 'dsa_users.db'))
+
+# Upper bound on filter specs accepted by /api/problems/batch
+MAX_BATCH_QUERIES = 50
+
+# Session, registration and progress writes are group-committed by one writer thread
+write_queue = WriteBehindQueue(USER_DB_PATH)
+
+# Admission control: token buckets per IP / user, and a cap on concurrent PBKDF2 work
+rate_limiter = RateLimiter()
+kdf_cap = ConcurrencyCap()
+
+# On-demand request profiling (inert unless DSA_PROFILE_DIR is set)
+profiler = Profiler()
 
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
+    """Get read-only catalog database connection"""
+    return connect_catalog(DB_PATH)
+
+def get_user_db_connection(attach_catalog=False):
+    """Get user database connection; attach the catalog only for queries that join it"""
+    conn = sqlite3.connect(USER_DB_PATH, timeout=30, uri=True)
     conn.row_factory = sqlite3.Row
+    if attach_catalog:
+        conn.execute('ATTACH DATABASE ? AS catalog', (catalog_uri(DB_PATH),))
     return conn
 
 def hash_password(password, salt=None):
     """Hash password with salt"""
     if salt is None:
         salt = secrets.token_hex(16)
-    pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
+    with kdf_cap:
+        pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
     return pwd_hash.hex(), salt
 
 def verify_session(token):
@@ -37,7 +75,7 @@ def verify_session(token):
         return None
     
     try:
-        conn = get_db_connection()
+        conn = get_user_db_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT user_id FROM sessions 
@@ -50,6 +88,87 @@ def verify_session(token):
         print(f"Session verification error: {e}")
         return None
 
+def build_problem_filters(company='all', duration='5. All', difficulty='all', search='', topic=''):
+    """Build the WHERE clause and parameters for the problem filters"""
+    where = '1=1'
+    params = []
+    
+    if company != 'all':
+        where += ' AND company = ?'
+        params.append(company)
+    
+    if duration != '5. All':
+        where += ' AND duration = ?'
+        params.append(duration)
+    
+    if difficulty != 'all':
+        where += ' AND difficulty = ?'
+        params.append(difficulty)
+    
+    if search:
+        where += " AND title LIKE ? ESCAPE '\\'"
+        params.append(f"%{escape_like(search)}%")
+    
+    if topic:
+        where += " AND (', ' || topics || ',') LIKE ? ESCAPE '\\'"
+        params.append(f"%, {escape_like(topic)},%")
+    
+    return where, params
+
+def problem_from_row(row):
+    """Convert a problems row to its API dictionary"""
+    return {
+        'id': row['id'],
+        'company': row['company'],
+        'duration': row['duration'],
+        'difficulty': row['difficulty'],
+        'title': row['title'],
+        'frequency': row['frequency'],
+        'acceptance_rate': row['acceptance_rate'],
+        'link': row['link'],
+        'topics': row['topics']
+    }
+
+@app.before_request
+def apply_rate_limits():
+    """Shed bursts on expensive endpoints with 429 and Retry-After"""
+    limit_class = endpoint_class(request.path, request.args.get('company'))
+    if limit_class is None:
+        return None
+    
+    ip = client_ip(request.remote_addr, request.headers.get('X-Forwarded-For'))
+    user = None
+    cost = 1
+    if request.path == '/api/problems/batch':
+        cost = batch_cost(request.get_json(silent=True))
+    if limit_class == 'auth':
+        data = request.get_json(silent=True) or {}
+        username = data.get('username') if isinstance(data, dict) else None
+        user = f"user:{str(username).strip().lower()}" if username else None
+    else:
+        token = request.headers.get('Authorization', '').replace('Bearer ', '')
+        user = f"session:{token}" if token else None
+    
+    wait = rate_limiter.check(limit_class, f"ip:{ip}", user, cost=cost)
+    if wait:
+        response = jsonify({'error': 'Too many requests, please slow down'})
+        response.status_code = 429
+        response.headers['Retry-After'] = retry_after_header(wait)
+        return response
+    return None
+
+if profiler.enabled:
+    @app.before_request
+    def start_profiling():
+        """Profile this request if it carries the token or its route is armed"""
+        g.profile_session = profiler.start(request.path, request.headers.get('X-Profile'))
+    
+    @app.teardown_request
+    def stop_profiling(exc):
+        session = g.pop('profile_session', None)
+        if session is not None:
+            session.stop()
+
 # Static file serving
 @app.route('/')
 def index():
@@ -57,6 +176,23 @@ def index():
 
 @app.route('/<path:path>')
 def serve_static(path):
+    # Company pages prerendered at import are answered from memory
+    if path == 'problems.html' and request.args.get('company'):
+        page = get_cached(DB_PATH, 'company_pages', build_page_cache).get(
+            request.args.get('company'), request.args.get('duration'))
+        if page:
+            body, digest = page
+            compressed = accepts_gzip(request.headers.get('Accept-Encoding'))
+            etag = page_etag(digest, compressed)
+            if request.headers.get('If-None-Match') == etag:
+                return Response(status=304, headers={'ETag': etag, 'Vary': 'Accept-Encoding'})
+            headers = {'ETag': etag, 'Vary': 'Accept-Encoding'}
+            if compressed:
+                headers['Content-Encoding'] = 'gzip'
+            else:
+                body = gzip.decompress(body)
+            return Response(body, mimetype='text/html', headers=headers)
+    
     if path and os.path.exists(path):
         return send_from_directory('.', path)
     return send_from_directory('.', 'login.html')
@@ -82,51 +218,141 @@ def get_problems():
         duration = request.args.get('duration', '5. All')
         difficulty = request.args.get('difficulty', 'all')
         search = request.args.get('search', '')
+        topic = request.args.get('topic', '')
+        view = request.args.get('view', 'rows')
+        fmt = request.args.get('format', 'json')
+        
+        if view not in ('rows', 'consolidated'):
+            return jsonify({'error': "view must be 'rows' or 'consolidated'"}), 400
+        if fmt not in ('json', 'columnar'):
+            return jsonify({'error': "format must be 'json' or 'columnar'"}), 400
+        
+        # Dictionary-encoded columns; dictionaries=<version> skips dictionaries the client already has
+        if fmt == 'columnar':
+            if view != 'rows':
+                return jsonify({'error': 'format=columnar supports the row view only'}), 400
+            encoder = get_cached(DB_PATH, 'columnar_encoder', build_columnar_encoder)
+            if filter_engine_enabled():
+                engine = get_cached(DB_PATH, 'filter_engine', build_filter_engine)
+                ids = engine.ids(company, duration, difficulty, search, topic)
+            else:
+                conn = get_db_connection()
+                where, query_params = build_problem_filters(company, duration, difficulty, search, topic)
+                ids = [row[0] for row in conn.execute(
+                    f'SELECT id FROM problems WHERE {where} ORDER BY company, difficulty, title', query_params)]
+                conn.close()
+            include_dictionaries = request.args.get('dictionaries') != str(encoder.version)
+            return Response(encoder.encode(ids, include_dictionaries) + '\n', content_type='application/json')
+        
+        # Optional in-memory bitmap engine (DSA_FILTER_ENGINE=1)
+        if filter_engine_enabled() and view == 'rows':
+            engine = get_cached(DB_PATH, 'filter_engine', build_filter_engine)
+            positions = engine.positions(company, duration, difficulty, search, topic)
+            return Response(engine.json_array(positions) + b'\n', content_type='application/json')
         
         conn = get_db_connection()
         cursor = conn.cursor()
         
         # Build query with filters
-        query = 'SELECT * FROM problems WHERE 1=1'
-        query_params = []
+        if view == 'consolidated':
+            # One row per company problem; a duration keeps problems present in that window
+            where, query_params = build_problem_filters(company, '5. All', difficulty, search, topic)
+            if duration != '5. All':
+                where += ' AND (windows & ?) != 0'
+                query_params.append(window_bit(duration))
+            query = f'SELECT json FROM consolidated_problems WHERE {where} ORDER BY company, difficulty, title'
+        else:
+            where, query_params = build_problem_filters(company, duration, difficulty, search, topic)
+            query = f'SELECT json FROM problems WHERE {where} ORDER BY company, difficulty, title'
         
-        if company != 'all':
-            query += ' AND company = ?'
-            query_params.append(company)
+        # Rows carry their serialized JSON from import; the body is just a join
+        cursor.execute(query, query_params)
+        body = '[' + ','.join(row[0] for row in cursor.fetchall()) + ']\n'
         
-        if duration != '5. All':
-            query += ' AND duration = ?'
-            query_params.append(duration)
+        conn.close()
+        return Response(body, content_type='application/json')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Get several filtered problem lists in one round-trip
+@app.route('/api/problems/batch', methods=['POST'])
+def get_problems_batch():
+    try:
+        data = request.get_json(silent=True) or {}
+        specs = data.get('queries')
+        if not isinstance(specs, list) or not specs:
+            return jsonify({'error': 'queries must be a non-empty list'}), 400
+        if len(specs) > MAX_BATCH_QUERIES:
+            return jsonify({'error': f'At most {MAX_BATCH_QUERIES} queries per batch'}), 400
+        if not all(isinstance(spec, dict) for spec in specs):
+            return jsonify({'error': 'Each query must be an object'}), 400
         
-        if difficulty != 'all':
-            query += ' AND difficulty = ?'
-            query_params.append(difficulty)
+        filters = [(
+            str(spec.get('company', 'all')),
+            str(spec.get('duration', '5. All')),
+            str(spec.get('difficulty', 'all')),
+            str(spec.get('search', '')),
+            str(spec.get('topic', ''))
+        ) for spec in specs]
         
-        if search:
-            query += ' AND title LIKE ?'
-            query_params.append(f"%{search}%")
+        if filter_engine_enabled():
+            engine = get_cached(DB_PATH, 'filter_engine', build_filter_engine)
+            body = b','.join(engine.json_array(engine.positions(*f)) for f in filters)
+            return Response(b'{"results":[' + body + b']}\n', content_type='application/json')
         
-        query += ' ORDER BY company, difficulty, title'
+        # One compound query; batch_index tags which spec each row answers
+        parts = []
+        query_params = []
+        for index, f in enumerate(filters):
+            where, params = build_problem_filters(*f)
+            parts.append(f'SELECT {index} AS batch_index, company, difficulty, title, id, json FROM problems WHERE {where}')
+            query_params.extend(params)
+        query = ' UNION ALL '.join(parts) + ' ORDER BY batch_index, company, difficulty, title, id'
         
+        conn = get_db_connection()
+        cursor = conn.cursor()
         cursor.execute(query, query_params)
         
-        # Convert rows to dictionaries
-        problems = []
+        # Same precomputed row fragments as the engine path, so both write identical bytes
+        results = [[] for _ in filters]
         for row in cursor.fetchall():
-            problems.append({
-                'id': row['id'],
-                'company': row['company'],
-                'duration': row['duration'],
-                'difficulty': row['difficulty'],
-                'title': row['title'],
-                'frequency': row['frequency'],
-                'acceptance_rate': row['acceptance_rate'],
-                'link': row['link'],
-                'topics': row['topics']
-            })
+            results[row['batch_index']].append(row['json'])
+        body = ','.join('[' + ','.join(fragments) + ']' for fragments in results).encode('utf-8')
         
         conn.close()
-        return jsonify(problems)
+        return Response(b'{"results":[' + body + b']}\n', content_type='application/json')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Stream filtered problems as NDJSON or CSV (resume with after=<last id>)
+@app.route('/api/export', methods=['GET'])
+def export_problems():
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        try:
+            after = int(request.args.get('after', 0))
+        except ValueError:
+            return jsonify({'error': 'after must be a problem id'}), 400
+        
+        where, query_params = build_problem_filters(
+            request.args.get('company', 'all'),
+            request.args.get('duration', '5. All'),
+            request.args.get('difficulty', 'all'),
+            request.args.get('search', ''),
+            request.args.get('topic', '')
+        )
+        
+        chunks = iter_export(get_db_connection(), where, query_params, fmt, after)
+        headers = {'Content-Disposition': f'attachment; filename=problems.{fmt}', 'Vary': 'Accept-Encoding'}
+        if accepts_gzip(request.headers.get('Accept-Encoding')):
+            chunks = gzip_stream(chunks)
+            headers['Content-Encoding'] = 'gzip'
+        
+        return Response(chunks, content_type=EXPORT_FORMATS[fmt], headers=headers)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -169,13 +395,280 @@ def get_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# API: Get trending problems (risers and fallers between duration windows)
+@app.route('/api/trends', methods=['GET'])
+def get_trends():
+    try:
+        company = request.args.get('company', 'all')
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        columns = 'title, difficulty, link, recent_frequency, baseline_frequency, delta, status'
+        cursor.execute(f'''
+            SELECT {columns} FROM trends
+            WHERE company = ? AND delta > 0
+            ORDER BY delta DESC, title
+            LIMIT ?
+        ''', (company, limit))
+        risers = [dict(row) for row in cursor.fetchall()]
+        
+        cursor.execute(f'''
+            SELECT {columns} FROM trends
+            WHERE company = ? AND delta < 0
+            ORDER BY delta ASC, title
+            LIMIT ?
+        ''', (company, limit))
+        fallers = [dict(row) for row in cursor.fetchall()]
+        
+        conn.close()
+        return jsonify({'company': company, 'risers': risers, 'fallers': fallers})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Topic co-occurrence, company emphasis and difficulty mix (precomputed at import)
+@app.route('/api/analytics/topics', methods=['GET'])
+def get_topic_analytics():
+    try:
+        topic = request.args.get('topic') or None
+        company = request.args.get('company') or None
+        limit = min(max(request.args.get('limit', TOPIC_LIMIT, type=int), 1), MAX_TOPIC_LIMIT)
+        
+        conn = get_db_connection()
+        try:
+            analytics = topic_analytics(conn, topic, company, limit)
+        finally:
+            conn.close()
+        return jsonify(analytics)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Study plan across several companies (union / intersection / atleast=K)
+@app.route('/api/plan', methods=['GET'])
+def get_plan():
+    try:
+        companies = request.args.get('companies', '').split(',')
+        mode = request.args.get('mode', 'union')
+        duration = request.args.get('duration', '5. All')
+        
+        index = get_cached(DB_PATH, 'plan_index', build_plan_index)
+        return jsonify(build_plan(index, [c.strip() for c in companies], mode, duration))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Catalog changes since a version (delta sync for client-side caches)
+@app.route('/api/catalog/changes', methods=['GET'])
+def get_catalog_changes():
+    try:
+        since = request.args.get('since', 0, type=int)
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT key, value FROM catalog_meta WHERE key IN ('version', 'base_version')")
+        meta = {row['key']: int(row['value']) for row in cursor.fetchall()}
+        version = meta.get('version', 0)
+        
+        # Clients older than the database itself have to start over
+        reset = since < meta.get('base_version', 0)
+        if reset:
+            cursor.execute('SELECT * FROM problems ORDER BY id')
+            inserts = [problem_from_row(row) for row in cursor.fetchall()]
+            updates = []
+            deletes = []
+        else:
+            cursor.execute('SELECT * FROM problems WHERE version > ? ORDER BY id', (since,))
+            inserts = []
+            updates = []
+            for row in cursor.fetchall():
+                target = inserts if row['created_version'] > since else updates
+                target.append(problem_from_row(row))
+            cursor.execute('SELECT id FROM problem_tombstones WHERE version > ? ORDER BY id', (since,))
+            deletes = [row['id'] for row in cursor.fetchall()]
+        
+        conn.close()
+        return jsonify({
+            'version': version,
+            'since': since,
+            'reset': reset,
+            'inserts': inserts,
+            'updates': updates,
+            'deletes': deletes
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Autocomplete across problem titles, companies and topics
+@app.route('/api/suggest', methods=['GET'])
+def get_suggestions():
+    try:
+        query = request.args.get('q', '')
+        limit = request.args.get('limit', 10, type=int)
+        
+        index = get_cached(DB_PATH, 'suggest_index', build_suggest_index)
+        return jsonify(index.suggest(query, limit))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Random practice set weighted by frequency (solved problems excluded when signed in)
+@app.route('/api/practice', methods=['GET'])
+def get_practice_set():
+    try:
+        company = request.args.get('company', '')
+        duration = request.args.get('duration', '5. All')
+        difficulty = request.args.get('difficulty', 'all')
+        n = request.args.get('n', DEFAULT_SET_SIZE, type=int)
+        if not company:
+            return jsonify({'error': 'company is required'}), 400
+        
+        excluded = set()
+        index = get_cached(DB_PATH, 'practice_index', build_practice_index)
+        token = request.headers.get('Authorization', '').replace('Bearer ', '')
+        user_id = verify_session(token) if token else None
+        if user_id:
+            conn = get_user_db_connection()
+            try:
+                excluded = index.solved_links(solved_problem_ids(conn, user_id))
+            finally:
+                conn.close()
+        
+        problems = index.draw(company, duration, difficulty, n, excluded)
+        if problems is None:
+            return jsonify({'error': 'No problems for that company, duration and difficulty'}), 404
+        return jsonify({
+            'company': company,
+            'duration': duration,
+            'difficulty': difficulty,
+            'problems': problems
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Arm profiling for the next N (or a sampled fraction of) requests to a route
+@app.route('/api/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    if not profiler.authorized(request.headers.get('X-Profile-Token')):
+        return jsonify({'error': 'Not found'}), 404
+    
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        route = data.get('route')
+        if not route or not isinstance(route, str):
+            return jsonify({'error': 'route is required'}), 400
+        try:
+            profiler.arm(route, int(data.get('requests', 1)), float(data.get('sample_rate', 1.0)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'requests and sample_rate must be numbers'}), 400
+    
+    return jsonify({'armed': profiler.status(), 'output_dir': profiler.output_dir})
+
+# API: Get or update the signed-in user's problem statuses
+@app.route('/api/progress', methods=['GET', 'POST'])
+def user_progress():
+    token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user_id = verify_session(token)
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        if request.method == 'GET':
+            conn = get_user_db_connection()
+            try:
+                return jsonify(load_progress(conn, user_id, request.args.get('company')))
+            finally:
+                conn.close()
+        
+        data = request.get_json(silent=True) or {}
+        conn = get_db_connection()
+        try:
+            save_progress(write_queue, conn, user_id, data.get('problem_id'), data.get('status'))
+        finally:
+            conn.close()
+        return jsonify({'success': True})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except (WriteQueueFull, TimeoutError) as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Solved problems due for spaced-repetition review
+@app.route('/api/review/due', methods=['GET'])
+def get_due_reviews():
+    token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user_id = verify_session(token)
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        conn = get_user_db_connection(attach_catalog=True)
+        try:
+            return jsonify(due_reviews(conn, user_id, request.args.get('limit', 20, type=int)))
+        finally:
+            conn.close()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Grade a review (quality 0-5) and reschedule it
+@app.route('/api/review/<int:problem_id>', methods=['POST'])
+def review_problem(problem_id):
+    token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user_id = verify_session(token)
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        conn = get_user_db_connection()
+        try:
+            return jsonify(record_review(write_queue, conn, user_id, problem_id, data.get('quality')))
+        finally:
+            conn.close()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except (WriteQueueFull, TimeoutError) as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# API: Leaderboards (board=overall|company|difficulty, value=<company or difficulty>)
+@app.route('/api/leaderboard', methods=['GET'])
+def get_leaderboard():
+    try:
+        token = request.headers.get('Authorization', '').replace('Bearer ', '')
+        user_id = verify_session(token) if token else None
+        
+        leaderboards = get_cached(DB_PATH, 'leaderboards', build_leaderboards)
+        conn = get_user_db_connection()
+        try:
+            return jsonify(leaderboard_response(
+                leaderboards, conn,
+                request.args.get('board', 'overall'),
+                request.args.get('value', ''),
+                request.args.get('limit', 10, type=int),
+                user_id
+            ))
+        finally:
+            conn.close()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # API: Check session validity
 @app.route('/api/check-session', methods=['GET'])
 def check_session():
     token = request.headers.get('Authorization', '').replace('Bearer ', '')
     user_id = verify_session(token)
     if user_id:
-        conn = get_db_connection()
+        conn = get_user_db_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT username FROM users WHERE id = ?', (user_id,))
         user = cursor.fetchone()
@@ -187,7 +680,9 @@ def check_session():
 @app.route('/api/register', methods=['POST'])
 def register():
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
         username = data.get('username', '').strip()
         email = data.get('email', '').strip()
         password = data.get('password', '')
@@ -205,22 +700,18 @@ def register():
         # Hash password
         pwd_hash, salt = hash_password(password)
         
-        # Insert user
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+        # Insert user (group-committed by the write-behind queue)
         try:
-            cursor.execute('''
+            write_queue.execute('''
                 INSERT INTO users (username, email, password_hash, salt)
                 VALUES (?, ?, ?, ?)
             ''', (username, email, pwd_hash, salt))
-            conn.commit()
-            conn.close()
             return jsonify({'success': True, 'message': 'Registration successful'})
         except sqlite3.IntegrityError:
-            conn.close()
             return jsonify({'error': 'Username or email already exists'}), 400
             
+    except (WriteQueueFull, TimeoutError, ServerBusy) as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -228,7 +719,9 @@ def register():
 @app.route('/api/login', methods=['POST'])
 def login():
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
         username = data.get('username', '').strip()
         password = data.get('password', '')
         
@@ -236,7 +729,7 @@ def login():
             return jsonify({'error': 'Username and password are required'}), 400
         
         # Get user
-        conn = get_db_connection()
+        conn = get_user_db_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT id, password_hash, salt FROM users WHERE username = ?', (username,))
         user = cursor.fetchone()
@@ -251,16 +744,16 @@ def login():
             conn.close()
             return jsonify({'error': 'Invalid username or password'}), 401
         
-        # Create session
+        conn.close()
+        
+        # Create session (durable before the token is handed out)
         token = secrets.token_urlsafe(32)
         expires_at = datetime.now() + timedelta(days=7)
         
-        cursor.execute('''
+        write_queue.execute('''
             INSERT INTO sessions (user_id, token, expires_at)
             VALUES (?, ?, ?)
         ''', (user['id'], token, expires_at))
-        conn.commit()
-        conn.close()
         
         return jsonify({
             'success': True,
@@ -268,14 +761,20 @@ def login():
             'username': username
         })
         
+    except (WriteQueueFull, TimeoutError, ServerBusy) as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Warm the in-memory filter engine at worker start when enabled
+if filter_engine_enabled() and os.path.exists(DB_PATH):
+    get_cached(DB_PATH, 'filter_engine', build_filter_engine)
+
 # Initialize database on startup
 @app.before_request
 def initialize_database():
     """Initialize database if needed"""
-    if not os.path.exists(DB_PATH):
+    if not os.path.exists(DB_PATH) or not os.path.exists(USER_DB_PATH):
         print("⚠️ Database not found. Please run init_database.py and init_auth.py first.")
 
 if __name__ == '__main__':
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Import and API Benchmark
+Synthesizes data/<Company>/<n. Duration>.csv trees at a multiple of the real
+catalog's size (problems, topics, per-window list lengths and frequency
+distributions are resampled from the existing files), imports each one with
+init_database.py, and measures import rows/sec, database size, index build
+time, and cold vs warm /api/problems and /api/stats latency.
+
+Usage:
+    python benchmark.py --scales 1,10,100 --output bench_report.json
+    python benchmark.py --generate-only ./synthetic --scales 10
+"""
+
+import os
+import io
+import csv
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import statistics
+import contextlib
+from pathlib import Path
+from collections import Counter
+
+DURATIONS = [
+    '1. Thirty Days',
+    '2. Three Months',
+    '3. Six Months',
+    '4. More Than Six Months',
+    '5. All'
+]
+CSV_HEADER = ['Difficulty', 'Title', 'Frequency', 'Acceptance Rate', 'Link', 'Topics']
+WARM_REQUESTS = 5
+
+def load_templates(source):
+    """Problem pool, per-company window sizes and frequency values from the real data"""
+    pool = {}
+    popularity = Counter()
+    shapes = []
+    frequencies = []
+    for company_dir in sorted(Path(source).iterdir()):
+        if not company_dir.is_dir():
+            continue
+        shape = {}
+        for duration in DURATIONS:
+            csv_file = company_dir / f"{duration}.csv"
+            if not csv_file.exists():
+                continue
+            with open(csv_file, 'r', encoding='utf-8') as f:
+                rows = [row for row in csv.DictReader(f) if row.get('Title') and row.get('Link')]
+            shape[duration] = len(rows)
+            for row in rows:
+                pool.setdefault(row['Link'], row)
+                try:
+                    frequencies.append(float(row['Frequency']))
+                except (TypeError, ValueError):
+                    pass
+                if duration == '5. All':
+                    popularity[row['Link']] += 1
+        if shape:
+            shapes.append(shape)
+    return pool, popularity, shapes, frequencies
+
+def weighted_sample(rng, links, weights, k):
+    """Approximate weighted sampling without replacement"""
+    k = min(k, len(links))
+    chosen = list(dict.fromkeys(rng.choices(links, weights=weights, k=k * 3)))[:k]
+    if len(chosen) < k:
+        remaining = set(links) - set(chosen)
+        chosen.extend(rng.sample(sorted(remaining), k - len(chosen)))
+    return chosen
+
+def generate_dataset(target, scale, source='data', seed=0):
+    """Write a synthetic data/ tree with scale x the real number of companies"""
+    rng = random.Random(seed)
+    pool, popularity, shapes, frequencies = load_templates(source)
+    links = sorted(pool)
+    weights = [popularity[link] + 1 for link in links]
+
+    target = Path(target)
+    company_count = max(1, round(len(shapes) * scale))
+    file_count = 0
+    row_count = 0
+    for i in range(company_count):
+        shape = rng.choice(shapes)
+        chosen = weighted_sample(rng, links, weights, max(shape.values()))
+        company_dir = target / f"Synthetic Company {i:06d}"
+        company_dir.mkdir(parents=True, exist_ok=True)
+
+        for duration, size in shape.items():
+            # Shorter windows are subsets of the company's overall list
+            subset = chosen if size >= len(chosen) else rng.sample(chosen, size)
+            values = sorted(rng.choices(frequencies, k=len(subset)), reverse=True)
+            with open(company_dir / f"{duration}.csv", 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_HEADER)
+                for link, frequency in zip(subset, values):
+                    row = pool[link]
+                    writer.writerow([row['Difficulty'], row['Title'], frequency,
+                                     row['Acceptance Rate'], link, row.get('Topics', '')])
+            file_count += 1
+            row_count += len(subset)
+
+    return {'companies': company_count, 'csv_files': file_count, 'csv_rows': row_count}
+
+def time_call(func, *args):
+    """Run func and return (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def run_import(workdir):
+    """Import workdir/data into workdir/dsa_problems.db and time each stage"""
+    import init_database
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # The same stages as init_database.main(), so the figures describe a real import
+            conn = init_database.create_database()
+            version = init_database.next_catalog_version(conn)
+            rows, stages = init_database.build_catalog(conn, version, 'dsa_problems.db')
+
+            # Rebuild the problems indexes on the full table to time index construction
+            cursor = conn.cursor()
+            cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'problems' AND sql IS NOT NULL")
+            indexes = cursor.fetchall()
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX {name}')
+            start = time.perf_counter()
+            for _, sql in indexes:
+                cursor.execute(sql)
+            conn.commit()
+            index_seconds = time.perf_counter() - start
+            conn.close()
+    finally:
+        os.chdir(cwd)
+
+    db_path = os.path.join(workdir, 'dsa_problems.db')
+    import_seconds = sum(stages.values())
+    return {
+        'rows': rows,
+        'import_seconds': round(import_seconds, 3),
+        'rows_per_second': round(rows / import_seconds) if import_seconds else None,
+        'stage_seconds': {name: round(seconds, 3) for name, seconds in stages.items()},
+        'index_build_seconds': round(index_seconds, 3),
+        'db_bytes': os.path.getsize(db_path),
+        'snapshot_bytes': os.path.getsize(os.path.join(workdir, 'dsa_problems.snapshot'))
+    }
+
+def measure_api(workdir):
+    """Cold (first) and warm (median) latency of the catalog endpoints, in ms"""
+    os.environ['DSA_RATE_LIMIT'] = '0'
+    import app
+
+    app.DB_PATH = os.path.join(workdir, 'dsa_problems.db')
+    client = app.app.test_client()
+    conn = sqlite3.connect(app.DB_PATH)
+    company = conn.execute('SELECT company FROM problems ORDER BY company LIMIT 1').fetchone()[0]
+    conn.close()
+
+    results = {}
+    for name, url in (('stats', '/api/stats'),
+                      ('problems_company', f'/api/problems?company={company}'),
+                      ('problems_all', '/api/problems')):
+        timings = []
+        for _ in range(1 + WARM_REQUESTS):
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f'{url} returned {response.status_code}')
+        results[name] = {
+            'cold_ms': round(timings[0], 2),
+            'warm_ms': round(statistics.median(timings[1:]), 2),
+            'bytes': len(response.data)
+        }
+    return results
+
+def run_scale(scale, source, seed, keep_dir=None):
+    """Generate, import and measure one scale"""
+    workdir = keep_dir or tempfile.mkdtemp(prefix=f'dsa-bench-{scale}x-')
+    try:
+        dataset, generate_seconds = time_call(
+            generate_dataset, os.path.join(workdir, 'data'), scale, source, seed)
+        report = {'scale': scale, 'dataset': dataset, 'generate_seconds': round(generate_seconds, 3)}
+        report['import'] = run_import(workdir)
+        report['api'] = measure_api(workdir)
+        return report
+    finally:
+        if keep_dir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def print_report(reports):
+    """Human-readable summary table"""
+    print("=" * 70)
+    print("📊 Import / API benchmark")
+    print("=" * 70)
+    print(f"{'scale':>6} {'companies':>10} {'rows':>10} {'rows/s':>9} {'db MB':>7} {'index s':>8}"
+          f" {'stats c/w ms':>14} {'company c/w ms':>15}")
+    for r in reports:
+        api = r['api']
+        print(f"{r['scale']:>5}x {r['dataset']['companies']:>10} {r['import']['rows']:>10}"
+              f" {r['import']['rows_per_second']:>9} {r['import']['db_bytes'] / 1e6:>7.1f}"
+              f" {r['import']['index_build_seconds']:>8}"
+              f" {api['stats']['cold_ms']:>6}/{api['stats']['warm_ms']:<7}"
+              f" {api['problems_company']['cold_ms']:>7}/{api['problems_company']['warm_ms']:<7}")
+    print("=" * 70)
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic-data import and API benchmark')
+    parser.add_argument('--scales', default='1,10', help='comma-separated multiples of the real company count')
+    parser.add_argument('--source', default='data', help='real data folder to model the synthetic data on')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--generate-only', metavar='DIR', help='only write the synthetic data tree(s) under DIR')
+    args = parser.parse_args()
+
+    scales = [float(s) if '.' in s else int(s) for s in args.scales.split(',') if s.strip()]
+    if not Path(args.source).is_dir():
+        print(f"Error: '{args.source}' folder not found!")
+        sys.exit(1)
+
+    if args.generate_only:
+        for scale in scales:
+            target = Path(args.generate_only) / f"{scale}x" / 'data'
+            dataset = generate_dataset(target, scale, args.source, args.seed)
+            print(f"✓ {scale}x: {dataset['companies']} companies, {dataset['csv_rows']} rows -> {target}")
+        return
+
+    reports = []
+    for scale in scales:
+        print(f"⏱  Running {scale}x ...", flush=True)
+        reports.append(run_scale(scale, args.source, args.seed))
+    print_report(reports)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'reports': reports}, f, indent=2)
+        print(f"✓ Report written to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Catalog Version Cache
+Per-process cache for structures built from the problems catalog,
+rebuilt only when init_database.py stamps a new catalog version.
+The catalog file is only ever replaced whole (never written in place while
+servers run), so it is opened read-only and immutable: no locks, no journal
+checks, and pages come straight from a shared mmap.
+"""
+
+import os
+import sqlite3
+import threading
+from urllib.parse import quote
+
+CATALOG_MMAP_SIZE = int(os.environ.get('DSA_CATALOG_MMAP', 256 * 1024 * 1024))
+
+_lock = threading.Lock()
+_versions = {}  # db_path -> ((mtime_ns, inode), version)
+_cache = {}     # (db_path, name) -> (version, value)
+
+def catalog_uri(db_path):
+    """SQLite URI that opens the catalog read-only and immutable"""
+    return f"file:{quote(os.path.abspath(db_path))}?mode=ro&immutable=1"
+
+def connect_catalog(db_path):
+    """Read-only catalog connection with a large mmap window"""
+    conn = sqlite3.connect(catalog_uri(db_path), uri=True)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f'PRAGMA mmap_size = {CATALOG_MMAP_SIZE}')
+    return conn
+
+def get_catalog_version(db_path):
+    """Return the catalog version stamped by init_database.py (0 if unknown)"""
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return 0
+
+    # Only hit SQLite when the file has been replaced since the last check
+    identity = (stat.st_mtime_ns, stat.st_ino)
+    known = _versions.get(db_path)
+    if known and known[0] == identity:
+        return known[1]
+
+    version = 0
+    try:
+        conn = connect_catalog(db_path)
+        try:
+            row = conn.execute("SELECT value FROM catalog_meta WHERE key = 'version'").fetchone()
+            version = int(row[0]) if row else 0
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        version = 0
+
+    _versions[db_path] = (identity, version)
+    return version
+
+def get_cached(db_path, name, builder):
+    """Return builder(conn) for the current catalog version, building it at most once"""
+    version = get_catalog_version(db_path)
+    entry = _cache.get((db_path, name))
+    if entry and entry[0] == version:
+        return entry[1]
+
+    with _lock:
+        entry = _cache.get((db_path, name))
+        if entry and entry[0] == version:
+            return entry[1]
+
+        conn = connect_catalog(db_path)
+        try:
+            value = builder(conn)
+        finally:
+            conn.close()
+
+        _cache[(db_path, name)] = (version, value)
+        return value
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Columnar Catalog Snapshot
+init_database.py writes the catalog as one read-only file next to
+dsa_problems.db: fixed-width columns in the API's sort order, an interned
+string table, sorted posting lists per filter value and each row's JSON
+fragment. Workers mmap it so every gunicorn process shares one physical copy
+through the page cache.
+"""
+
+import os
+import sys
+import mmap
+import math
+import struct
+from array import array
+from bisect import bisect_left
+
+MAGIC = b'DSASNAP2'
+HEADER = struct.Struct('<8sQII')  # magic, catalog version, row count, key count
+
+# Sections in file order: (name, array typecode)
+SECTIONS = [
+    ('string_offsets', 'Q'),   # string i is string_blob[offsets[i]:offsets[i + 1]]
+    ('string_blob', 'B'),
+    ('id', 'q'),
+    ('company', 'I'),          # string ids
+    ('duration', 'I'),
+    ('difficulty', 'I'),
+    ('title', 'I'),
+    ('link', 'I'),
+    ('topics', 'I'),
+    ('frequency', 'd'),        # NaN stands for NULL
+    ('acceptance_rate', 'd'),
+    ('key_column', 'B'),       # filter keys sorted by (column, value string)
+    ('key_value', 'I'),
+    ('posting_offsets', 'Q'),  # postings of key i are postings[offsets[i]:offsets[i + 1]]
+    ('postings', 'I'),         # sorted row positions
+    ('json_offsets', 'Q'),     # row i serialized is json_blob[offsets[i]:offsets[i + 1]]
+    ('json_blob', 'B'),
+]
+SECTION_TABLE = struct.Struct('<' + 'QQ' * len(SECTIONS))
+
+STRING_COLUMNS = ['company', 'duration', 'difficulty', 'title', 'link', 'topics']
+KEY_COLUMNS = ['company', 'duration', 'difficulty', 'topic']
+OUTPUT_COLUMNS = ['id', 'company', 'duration', 'difficulty', 'title',
+                  'frequency', 'acceptance_rate', 'link', 'topics']
+
+def snapshot_path(db_path):
+    """Snapshot file that sits alongside the given database"""
+    return os.path.splitext(db_path)[0] + '.snapshot'
+
+def split_topics(topics):
+    """Split a comma-separated topics string into topic names"""
+    return [topic.strip() for topic in (topics or '').split(',') if topic.strip()]
+
+def write_snapshot(conn, path, version):
+    """Write the columnar snapshot for the current problems table"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, company, duration, difficulty, title, frequency, acceptance_rate, link, topics, json
+        FROM problems
+        ORDER BY company, difficulty, title, id
+    ''')
+    rows = cursor.fetchall()
+
+    # Intern every string once
+    string_ids = {}
+    strings = []
+    def intern(value):
+        value = value or ''
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    sections = {name: array(code) for name, code in SECTIONS}
+    postings = {}
+    fragments = bytearray()
+    sections['json_offsets'].append(0)
+    for pos, (problem_id, company, duration, difficulty, title,
+              frequency, acceptance_rate, link, topics, fragment) in enumerate(rows):
+        sections['id'].append(problem_id)
+        fragments.extend(fragment.encode('utf-8'))
+        sections['json_offsets'].append(len(fragments))
+        for name, value in zip(STRING_COLUMNS, (company, duration, difficulty, title, link, topics)):
+            sections[name].append(intern(value))
+        sections['frequency'].append(math.nan if frequency is None else frequency)
+        sections['acceptance_rate'].append(math.nan if acceptance_rate is None else acceptance_rate)
+
+        for column, value in (('company', company), ('duration', duration), ('difficulty', difficulty)):
+            postings.setdefault((KEY_COLUMNS.index(column), value), []).append(pos)
+        for topic in split_topics(topics):
+            postings.setdefault((KEY_COLUMNS.index('topic'), topic), []).append(pos)
+
+    sections['posting_offsets'].append(0)
+    for column_code, value in sorted(postings):
+        sections['key_column'].append(column_code)
+        sections['key_value'].append(intern(value))
+        sections['postings'].extend(postings[(column_code, value)])
+        sections['posting_offsets'].append(len(sections['postings']))
+
+    blob = bytearray()
+    sections['string_offsets'].append(0)
+    for value in strings:
+        blob.extend(value.encode('utf-8'))
+        sections['string_offsets'].append(len(blob))
+    sections['string_blob'] = array('B', blob)
+    sections['json_blob'] = array('B', fragments)
+
+    if sys.byteorder != 'little':
+        for name, _ in SECTIONS:
+            sections[name].byteswap()
+
+    # Lay sections out 8-byte aligned after the header and section table
+    offset = HEADER.size + SECTION_TABLE.size
+    table = []
+    for name, _ in SECTIONS:
+        offset = (offset + 7) & ~7
+        length = len(sections[name]) * sections[name].itemsize
+        table.extend((offset, length))
+        offset += length
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, version, len(rows), len(postings)))
+        f.write(SECTION_TABLE.pack(*table))
+        for (name, _), section_offset in zip(SECTIONS, table[::2]):
+            f.write(b'\0' * (section_offset - f.tell()))
+            sections[name].tofile(f)
+
+    # Replace atomically so workers that still map the old file keep a valid view
+    try:
+        os.replace(tmp_path, path)
+    except PermissionError:
+        # Windows will not replace a file another process has mapped
+        os.remove(tmp_path)
+        raise
+    return len(rows)
+
+class CatalogSnapshot:
+    """Read-only, mmap-backed view of a snapshot file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.version, self.row_count, self.key_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a catalog snapshot')
+
+        table = SECTION_TABLE.unpack_from(self._mmap, HEADER.size)
+        view = memoryview(self._mmap)
+        self._sections = {}
+        for i, (name, code) in enumerate(SECTIONS):
+            offset, length = table[2 * i], table[2 * i + 1]
+            self._sections[name] = view[offset:offset + length].cast(code)
+
+        # The string table is small; decode it once instead of on every lookup
+        offsets = self._sections['string_offsets']
+        blob = bytes(self._sections['string_blob'])
+        self.strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+        self.strings_lower = [value.lower() for value in self.strings]
+
+    def string(self, string_id):
+        """Interned string by id"""
+        return self.strings[string_id]
+
+    def _postings(self, column, value):
+        """Sorted row positions for a filter value (binary search over the key directory)"""
+        column_code = KEY_COLUMNS.index(column)
+        key_column = self._sections['key_column']
+        key_value = self._sections['key_value']
+        lo, hi = 0, self.key_count
+        target = (column_code, value)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (key_column[mid], self.string(key_value[mid])) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.key_count or (key_column[lo], self.string(key_value[lo])) != target:
+            return None
+        offsets = self._sections['posting_offsets']
+        return self._sections['postings'][offsets[lo]:offsets[lo + 1]]
+
+    def positions(self, company='all', duration='5. All', difficulty='all', search='', topic=''):
+        """Row positions matching the same filters as get_problems, in API order"""
+        lists = []
+        for column, value, wildcard in (('company', company, 'all'),
+                                        ('duration', duration, '5. All'),
+                                        ('difficulty', difficulty, 'all'),
+                                        ('topic', topic, '')):
+            if value != wildcard:
+                postings = self._postings(column, value)
+                if postings is None:
+                    return []
+                lists.append(postings)
+
+        # Drive the intersection from the shortest posting list
+        if lists:
+            lists.sort(key=len)
+            positions = list(lists[0])
+            for postings in lists[1:]:
+                size = len(postings)
+                kept = []
+                for pos in positions:
+                    i = bisect_left(postings, pos)
+                    if i < size and postings[i] == pos:
+                        kept.append(pos)
+                positions = kept
+        else:
+            positions = range(self.row_count)
+
+        if search:
+            needle = search.lower()
+            titles = self._sections['title']
+            lowered = self.strings_lower
+            positions = [pos for pos in positions if needle in lowered[titles[pos]]]
+
+        return positions
+
+    def ids(self, *filters):
+        """Problem ids matching the filters, in API order"""
+        id_column = self._sections['id']
+        return [id_column[pos] for pos in self.positions(*filters)]
+
+    def json_array(self, positions):
+        """JSON array of the rows at the given positions, joined from their stored fragments"""
+        offsets = self._sections['json_offsets']
+        blob = self._sections['json_blob']
+        return b'[' + b','.join(blob[offsets[pos]:offsets[pos + 1]] for pos in positions) + b']'
+
+    def query(self, *filters):
+        """Return problem dicts matching the same filters as get_problems"""
+        return [self.row(pos) for pos in self.positions(*filters)]
+
+    def row(self, pos):
+        """Materialize one row as a problem dict"""
+        s = self._sections
+        strings = self.strings
+        problem = {}
+        for name in OUTPUT_COLUMNS:
+            value = s[name][pos]
+            if name in STRING_COLUMNS:
+                value = strings[value]
+            elif name != 'id' and math.isnan(value):
+                value = None
+            problem[name] = value
+        return problem
+
+def open_snapshot(path, version=None):
+    """Open a snapshot, or return None if it is missing, invalid or stale"""
+    if sys.byteorder != 'little':
+        return None  # columns are stored little-endian and mapped without copying
+    try:
+        snapshot = CatalogSnapshot(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if version is not None and snapshot.version != version:
+        return None
+    return snapshot
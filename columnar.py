@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Columnar Wire Format
+Opt-in format=columnar encoding for problem listings: one array per column
+instead of one object per row, with company, duration, difficulty and topic
+strings replaced by indexes into dictionaries. The dictionaries (and each
+row's encoded values) are built once per catalog version; clients that
+already hold them pass dictionaries=<version> to get just the columns.
+"""
+
+import os
+import json
+import sqlite3
+from catalog_snapshot import split_topics
+
+COLUMNS = ('id', 'company', 'duration', 'difficulty', 'title', 'frequency', 'acceptance_rate', 'link', 'topics')
+DICTIONARY_COLUMNS = ('company', 'duration', 'difficulty', 'topic')
+
+def compact_json(value):
+    """JSON without whitespace"""
+    return json.dumps(value, separators=(',', ':'))
+
+class ColumnarEncoder:
+    """Per-catalog-version dictionaries plus every row pre-encoded against them"""
+
+    def __init__(self, version, rows):
+        self.version = version
+        # Links share a long common prefix; send it once
+        prefix = os.path.commonprefix([row['link'] for row in rows]) if rows else ''
+        self.link_prefix = prefix[:prefix.rfind('/') + 1]
+
+        lookups = {name: {} for name in DICTIONARY_COLUMNS}
+        def encode(name, value):
+            return lookups[name].setdefault(value, len(lookups[name]))
+
+        self.rows = {}
+        for row in rows:
+            self.rows[row['id']] = (
+                row['id'],
+                encode('company', row['company']),
+                encode('duration', row['duration']),
+                encode('difficulty', row['difficulty']),
+                row['title'],
+                row['frequency'],
+                row['acceptance_rate'],
+                row['link'][len(self.link_prefix):],
+                [encode('topic', topic) for topic in split_topics(row['topics'])]
+            )
+
+        dictionaries = {name: list(values) for name, values in lookups.items()}
+        dictionaries['link_prefix'] = self.link_prefix
+        self.dictionaries_json = compact_json(dictionaries)
+
+    def encode(self, ids, include_dictionaries=True):
+        """JSON body for the given problem ids, in order"""
+        rows = [self.rows[problem_id] for problem_id in ids if problem_id in self.rows]
+        columns = {name: [row[i] for row in rows] for i, name in enumerate(COLUMNS)}
+        parts = [
+            '{"format":"columnar"',
+            f'"version":{self.version}',
+            f'"count":{len(rows)}',
+            '"columns":' + compact_json(columns)
+        ]
+        if include_dictionaries:
+            parts.append('"dictionaries":' + self.dictionaries_json)
+        return ','.join(parts) + '}'
+
+def build_columnar_encoder(conn):
+    """Encode every catalog row against fresh dictionaries"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT value FROM catalog_meta WHERE key = 'version'")
+        row = cursor.fetchone()
+        version = int(row[0]) if row else 0
+    except sqlite3.Error:
+        version = 0
+    cursor.execute('''
+        SELECT id, company, duration, difficulty, title, frequency, acceptance_rate, link, topics
+        FROM problems
+        ORDER BY company, difficulty, title
+    ''')
+    columns = [description[0] for description in cursor.description]
+    return ColumnarEncoder(version, [dict(zip(columns, row)) for row in cursor.fetchall()])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Consolidated Problem View
+One row per (company, problem) instead of one per (company, duration,
+problem): link, topics and acceptance rate appear once, and the five
+duration windows collapse into a frequency vector (null where the problem is
+absent from a window) plus the matching row ids. Computed at import into
+consolidated_problems with each row's JSON precomputed, and served by
+/api/problems?view=consolidated.
+"""
+
+import json
+
+DURATIONS = [
+    '1. Thirty Days',
+    '2. Three Months',
+    '3. Six Months',
+    '4. More Than Six Months',
+    '5. All'
+]
+
+def window_bit(duration):
+    """Bit for a duration window in consolidated_problems.windows"""
+    if duration not in DURATIONS:
+        raise ValueError(f"Unknown duration: {duration}")
+    return 1 << DURATIONS.index(duration)
+
+def compute_consolidated(conn):
+    """Rebuild consolidated_problems from the problems table"""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM consolidated_problems')
+
+    cursor.execute('''
+        SELECT id, company, duration, difficulty, title, frequency, acceptance_rate, link, topics
+        FROM problems
+        ORDER BY company, link, duration
+    ''')
+    merged = {}
+    source_rows = 0
+    for problem_id, company, duration, difficulty, title, frequency, acceptance_rate, link, topics in cursor.fetchall():
+        if duration not in DURATIONS:
+            continue
+        source_rows += 1
+        slot = DURATIONS.index(duration)
+        entry = merged.get((company, link))
+        if entry is None:
+            entry = merged[(company, link)] = {
+                'company': company,
+                'link': link,
+                'frequencies': [None] * len(DURATIONS),
+                'ids': [None] * len(DURATIONS),
+                'windows': 0
+            }
+        # Later (wider) windows win for the descriptive fields
+        entry.update(title=title, difficulty=difficulty, topics=topics,
+                     acceptance_rate=acceptance_rate if acceptance_rate is not None else entry.get('acceptance_rate'))
+        entry['frequencies'][slot] = frequency
+        entry['ids'][slot] = problem_id
+        entry['windows'] |= 1 << slot
+
+    rows = []
+    for entry in merged.values():
+        windows = entry.pop('windows')
+        rows.append((entry['company'], entry['link'], entry['title'], entry['difficulty'], entry['topics'],
+                     windows, json.dumps(entry, sort_keys=True, separators=(',', ':'))))
+    cursor.executemany('''
+        INSERT INTO consolidated_problems (company, link, title, difficulty, topics, windows, json)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+
+    print(f"✓ Consolidated view: {len(rows)} rows (from {source_rows} window rows)")
+    return len(rows)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Streaming Catalog Export
+Serializes filtered problem rows as NDJSON or CSV straight from a SQLite
+cursor in fetchmany batches, so a full-catalog export never sits in memory.
+Rows are ordered by id; passing the last id seen as `after` resumes a
+dropped download.
+"""
+
+import io
+import csv
+import json
+import zlib
+
+EXPORT_COLUMNS = ['id', 'company', 'duration', 'difficulty', 'title',
+                  'frequency', 'acceptance_rate', 'link', 'topics']
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8'
+}
+BATCH_SIZE = 500
+
+def iter_export(conn, where, params, fmt='ndjson', after=0, batch_size=BATCH_SIZE):
+    """Yield encoded export chunks, one per fetchmany batch; closes conn when done"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT {', '.join(EXPORT_COLUMNS)} FROM problems
+            WHERE {where} AND id > ?
+            ORDER BY id
+        ''', list(params) + [after])
+
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if not after:
+                writer.writerow(EXPORT_COLUMNS)
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if fmt == 'csv':
+                writer.writerows(tuple(row) for row in rows)
+                chunk = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                chunk = ''.join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n' for row in rows)
+            yield chunk.encode('utf-8')
+    finally:
+        conn.close()
+
+def gzip_stream(chunks):
+    """Gzip a stream of byte chunks, flushing after each so clients see progress"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip"""
+    return 'gzip' in (accept_encoding or '').lower()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+In-Memory Filter Engine
+Optional replacement for the /api/problems SQL filters: the catalog is held
+as column arrays in the API's sort order, with a bitmap per filter value, so
+any filter combination is a bitmap intersection that never touches SQLite
+"""
+
+import os
+import sqlite3
+from study_plan import bitmap_from_positions, iter_bits
+from catalog_snapshot import snapshot_path, open_snapshot, split_topics
+
+COLUMNS = ['id', 'company', 'duration', 'difficulty', 'title',
+           'frequency', 'acceptance_rate', 'link', 'topics']
+
+def escape_like(value):
+    """Escape LIKE wildcards so SQL search matches the engines' plain substring match"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def filter_engine_enabled():
+    """Whether /api/problems should be answered from the in-memory engine"""
+    return os.environ.get('DSA_FILTER_ENGINE', '').lower() in ('1', 'true', 'yes')
+
+class FilterEngine:
+    """Column arrays plus per-value bitmaps over the sorted row positions"""
+
+    def __init__(self, columns, bitmaps, fragments):
+        self.columns = columns      # column name -> list of values, in sort order
+        self.bitmaps = bitmaps      # (column, value) -> int bitmap over positions
+        self.fragments = fragments  # per-row JSON from import, encoded, in sort order
+        self.row_count = len(columns['id'])
+        self.all_rows = (1 << self.row_count) - 1
+        self.titles_lower = [title.lower() for title in columns['title']]
+
+    def positions(self, company='all', duration='5. All', difficulty='all', search='', topic=''):
+        """Row positions matching the same filters as get_problems, in API order"""
+        selected = self.all_rows
+        for column, value, wildcard in (('company', company, 'all'),
+                                        ('duration', duration, '5. All'),
+                                        ('difficulty', difficulty, 'all'),
+                                        ('topic', topic, '')):
+            if value != wildcard:
+                selected &= self.bitmaps.get((column, value), 0)
+                if not selected:
+                    return []
+
+        positions = iter_bits(selected)
+        if search:
+            needle = search.lower()
+            titles = self.titles_lower
+            positions = [pos for pos in positions if needle in titles[pos]]
+        return positions
+
+    def ids(self, *filters):
+        """Problem ids matching the filters, in API order"""
+        id_column = self.columns['id']
+        return [id_column[pos] for pos in self.positions(*filters)]
+
+    def json_array(self, positions):
+        """JSON array of the rows at the given positions, joined from their stored fragments"""
+        fragments = self.fragments
+        return b'[' + b','.join(fragments[pos] for pos in positions) + b']'
+
+    def query(self, *filters):
+        """Return problem dicts matching the same filters as get_problems"""
+        columns = [(name, self.columns[name]) for name in COLUMNS]
+        return [{name: values[pos] for name, values in columns} for pos in self.positions(*filters)]
+
+def build_filter_engine(conn):
+    """Map the catalog snapshot if it is current, else build the engine in memory"""
+    db_path = conn.execute('PRAGMA database_list').fetchone()['file']
+    try:
+        row = conn.execute("SELECT value FROM catalog_meta WHERE key = 'version'").fetchone()
+        version = int(row['value']) if row else None
+    except sqlite3.Error:
+        version = None
+
+    if db_path and version is not None:
+        snapshot = open_snapshot(snapshot_path(db_path), version)
+        if snapshot is not None:
+            return snapshot
+    return build_memory_engine(conn)
+
+def build_memory_engine(conn):
+    """Load the catalog into column arrays and build the bitmap indexes"""
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT {', '.join(COLUMNS)}, json FROM problems
+        ORDER BY company, difficulty, title, id
+    ''')
+    rows = cursor.fetchall()
+
+    columns = {name: [row[name] for row in rows] for name in COLUMNS}
+    positions = {}
+    for pos, row in enumerate(rows):
+        for column in ('company', 'duration', 'difficulty'):
+            positions.setdefault((column, row[column]), []).append(pos)
+        for topic in split_topics(row['topics']):
+            positions.setdefault(('topic', topic), []).append(pos)
+
+    bitmaps = {key: bitmap_from_positions(pos_list, len(rows)) for key, pos_list in positions.items()}
+    return FilterEngine(columns, bitmaps, [row['json'].encode('utf-8') for row in rows])
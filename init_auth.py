@@ -1,16 +1,54 @@
 #!/usr/bin/env python3
 """
 Authentication Database Initialization
-Adds users table to existing database
+Creates the user database (users, sessions, progress) next to the catalog.
+It is kept apart from dsa_problems.db so login and progress commits never
+contend with catalog reads, and runs in WAL mode so its own readers don't
+wait on the writer either.
 """
 
+import os
 import sqlite3
 
+USER_DB = os.environ.get('DSA_USER_DB', 'dsa_users.db')
+CATALOG_DB = 'dsa_problems.db'
+USER_TABLES = ('users', 'sessions', 'user_progress', 'progress_events', 'review_schedule')
+
+def migrate_from_catalog(conn, catalog_path=CATALOG_DB):
+    """Copy user tables out of a catalog database that predates the split (into an empty user database only)"""
+    if not os.path.exists(catalog_path):
+        return 0
+    cursor = conn.cursor()
+    cursor.execute('SELECT 1 FROM users LIMIT 1')
+    if cursor.fetchone():
+        return 0
+    cursor.execute('ATTACH DATABASE ? AS legacy', (catalog_path,))
+    copied = 0
+    try:
+        for table in USER_TABLES:
+            cursor.execute(f'PRAGMA legacy.table_info({table})')
+            columns = ', '.join(row[1] for row in cursor.fetchall())
+            if not columns:
+                continue
+            cursor.execute(f'INSERT OR IGNORE INTO main.{table} ({columns}) SELECT {columns} FROM legacy.{table}')
+            copied += cursor.rowcount
+        conn.commit()
+    finally:
+        cursor.execute('DETACH DATABASE legacy')
+    return copied
+
 def init_auth_tables():
     """Create authentication tables"""
-    conn = sqlite3.connect('dsa_problems.db')
+    # DSA_USER_DB may point into a mounted volume that is still empty
+    directory = os.path.dirname(USER_DB)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(USER_DB)
     cursor = conn.cursor()
     
+    # Readers (session checks, progress loads) never block on the write-behind writer
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
     # Create users table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -36,6 +74,7 @@ def init_auth_tables():
     ''')
     
     # Create user_progress table to store per-user problem status
+    # (problem_id refers to problems.id in the catalog file, so it has no foreign key)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS user_progress (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -45,15 +84,55 @@ def init_auth_tables():
             status TEXT NOT NULL,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(user_id, problem_id),
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-            FOREIGN KEY (problem_id) REFERENCES problems(id) ON DELETE CASCADE
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    # Create progress_events log (lets each server process catch up on progress changes)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS progress_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            problem_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
     
+    # Create review_schedule table (spaced-repetition state for solved problems)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS review_schedule (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            problem_id INTEGER NOT NULL,
+            due_at TIMESTAMP NOT NULL,
+            interval_days INTEGER NOT NULL DEFAULT 0,
+            ease REAL NOT NULL DEFAULT 2.5,
+            repetitions INTEGER NOT NULL DEFAULT 0,
+            last_reviewed_at TIMESTAMP,
+            UNIQUE(user_id, problem_id),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    # Bring over users and progress from a dsa_problems.db created before the split
+    copied = migrate_from_catalog(conn)
+    if copied:
+        print(f"✓ Copied {copied} rows from {CATALOG_DB} into {USER_DB}")
+    
+    # Problems solved before the review queue existed are due a day after they were solved
+    cursor.execute('''
+        INSERT OR IGNORE INTO review_schedule (user_id, problem_id, due_at)
+        SELECT user_id, problem_id, datetime(updated_at, '+1 day')
+        FROM user_progress
+        WHERE status = 'solved'
+    ''')
+    
     # Create indexes
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_username ON users(username)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_token ON sessions(token)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_progress ON user_progress(user_id, company)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_review_due ON review_schedule(user_id, due_at)')
     
     conn.commit()
     conn.close()
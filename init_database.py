@@ -1,18 +1,28 @@
 #!/usr/bin/env python3
 """
 Database Initialization Script
-Extracts all problems from CSV files and stores them in SQLite database
+Extracts all problems from CSV files and stores them in SQLite database.
+The catalog is built in a side file and swapped in with one rename, so
+servers (which open it read-only and immutable) never see a partial write.
 """
 
 import os
 import sys
 import csv
+import json
+import time
 import sqlite3
 from pathlib import Path
+from catalog_snapshot import snapshot_path, write_snapshot
+from prerender import read_template, template_digest, render_company_pages
+from consolidated import compute_consolidated
+from topic_analytics import compute_topic_analytics
 
-def create_database():
+CATALOG_DB = 'dsa_problems.db'
+
+def create_database(db_path=CATALOG_DB):
     """Create the database schema"""
-    conn = sqlite3.connect('dsa_problems.db')
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # Create problems table
@@ -28,19 +38,157 @@ def create_database():
             link TEXT NOT NULL,
             topics TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_version INTEGER NOT NULL DEFAULT 0,
+            version INTEGER NOT NULL DEFAULT 0,
+            json TEXT,
             UNIQUE(company, duration, title)
         )
     ''')
     
+    # Databases created before row versioning get the version columns added
+    cursor.execute('PRAGMA table_info(problems)')
+    existing_columns = {row[1] for row in cursor.fetchall()}
+    for column in ('created_version', 'version'):
+        if column not in existing_columns:
+            cursor.execute(f'ALTER TABLE problems ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0')
+    if 'json' not in existing_columns:
+        cursor.execute('ALTER TABLE problems ADD COLUMN json TEXT')
+    
     # Create indexes for faster queries
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_company ON problems(company)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_duration ON problems(duration)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_difficulty ON problems(difficulty)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_title ON problems(title)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_problems_version ON problems(version)')
+    
+    # Create tombstones for rows removed by a re-import (served by /api/catalog/changes)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS problem_tombstones (
+            id INTEGER PRIMARY KEY,
+            company TEXT NOT NULL,
+            duration TEXT NOT NULL,
+            title TEXT NOT NULL,
+            version INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tombstones_version ON problem_tombstones(version)')
+    
+    # Create trends table (frequency deltas between duration windows)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trends (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company TEXT NOT NULL,
+            title TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            link TEXT NOT NULL,
+            recent_frequency REAL NOT NULL,
+            baseline_frequency REAL NOT NULL,
+            delta REAL NOT NULL,
+            status TEXT NOT NULL,
+            UNIQUE(company, title)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_trends_company_delta ON trends(company, delta)')
+    
+    # Create catalog metadata table (catalog version for server-side caches)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+    
+    # Create consolidated_problems table (one row per company problem, frequency per window)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS consolidated_problems (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company TEXT NOT NULL,
+            link TEXT NOT NULL,
+            title TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            topics TEXT,
+            windows INTEGER NOT NULL,
+            json TEXT NOT NULL,
+            UNIQUE(company, link)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_consolidated_company ON consolidated_problems(company, difficulty, title)')
+    
+    # Create topic analytics tables (derived from the problem x topic matrix)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topic_stats (
+            topic TEXT PRIMARY KEY,
+            problems INTEGER NOT NULL,
+            companies INTEGER NOT NULL,
+            avg_acceptance_rate REAL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topic_cooccurrence (
+            topic TEXT NOT NULL,
+            other_topic TEXT NOT NULL,
+            problems INTEGER NOT NULL,
+            jaccard REAL NOT NULL,
+            PRIMARY KEY (topic, other_topic)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topic_companies (
+            topic TEXT NOT NULL,
+            company TEXT NOT NULL,
+            problems INTEGER NOT NULL,
+            weight REAL NOT NULL,
+            PRIMARY KEY (topic, company)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_topic_companies_company ON topic_companies(company, weight)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topic_difficulty (
+            topic TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            problems INTEGER NOT NULL,
+            PRIMARY KEY (topic, difficulty)
+        )
+    ''')
+    
+    # Create company_pages table (gzipped problems.html prerendered per company)
+    cursor.execute('PRAGMA table_info(company_pages)')
+    if 'duration' in {row[1] for row in cursor.fetchall()}:
+        # Pages used to be rendered per duration window; the table is rebuilt on every import
+        cursor.execute('DROP TABLE company_pages')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS company_pages (
+            company TEXT PRIMARY KEY,
+            html BLOB NOT NULL
+        )
+    ''')
     
     conn.commit()
     return conn
 
+def schema_columns(conn):
+    """(table, column) pairs of every table in a database"""
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    return {(table, row[1]) for table in tables for row in conn.execute(f'PRAGMA table_info({table})')}
+
+def catalog_needs_upgrade(db_path=CATALOG_DB):
+    """Whether an existing catalog lacks tables, columns or data the servers now expect"""
+    expected = create_database(':memory:')
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            if not schema_columns(expected) <= schema_columns(conn):
+                return True
+            row = conn.execute("SELECT value FROM catalog_meta WHERE key = 'version'").fetchone()
+            missing = conn.execute('SELECT COUNT(*) FROM problems WHERE json IS NULL').fetchone()[0]
+            return row is None or missing > 0
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return True
+    finally:
+        expected.close()
+
 def normalize_difficulty(difficulty):
     """Normalize difficulty values"""
     if not difficulty:
@@ -99,8 +247,8 @@ def parse_csv_file(filepath):
     
     return problems
 
-def import_all_data(conn):
-    """Import all CSV data into the database"""
+def import_all_data(conn, version):
+    """Import all CSV data into the database, stamping changed rows with version"""
     cursor = conn.cursor()
     data_path = Path('data')
     
@@ -116,7 +264,17 @@ def import_all_data(conn):
         '5. All'
     ]
     
+    # Current rows, so a re-import only touches what actually changed
+    cursor.execute('''
+        SELECT id, company, duration, title, difficulty, frequency, acceptance_rate, link, topics
+        FROM problems
+    ''')
+    existing = {(row[1], row[2], row[3]): (row[0], tuple(row[4:])) for row in cursor.fetchall()}
+    seen = set()
+    
     total_imported = 0
+    total_inserted = 0
+    total_updated = 0
     total_skipped = 0
     companies_processed = 0
     
@@ -138,11 +296,26 @@ def import_all_data(conn):
                 problems = parse_csv_file(csv_file)
                 
                 for problem in problems:
-                    try:
+                    key = (company_name, duration, problem['title'])
+                    if key in seen:
+                        total_skipped += 1
+                        continue
+                    seen.add(key)
+                    
+                    values = (
+                        problem['difficulty'],
+                        problem['frequency'],
+                        problem['acceptance_rate'],
+                        problem['link'],
+                        problem['topics']
+                    )
+                    
+                    if key not in existing:
                         cursor.execute('''
-                            INSERT OR IGNORE INTO problems 
-                            (company, duration, difficulty, title, frequency, acceptance_rate, link, topics)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                            INSERT INTO problems 
+                            (company, duration, difficulty, title, frequency, acceptance_rate, link, topics,
+                             created_version, version)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                         ''', (
                             company_name,
                             duration,
@@ -151,32 +324,222 @@ def import_all_data(conn):
                             problem['frequency'],
                             problem['acceptance_rate'],
                             problem['link'],
-                            problem['topics']
+                            problem['topics'],
+                            version,
+                            version
                         ))
-                        
-                        if cursor.rowcount > 0:
-                            company_imported += 1
-                            total_imported += 1
-                        else:
-                            total_skipped += 1
+                        total_inserted += 1
+                    elif existing[key][1] != values:
+                        cursor.execute('''
+                            UPDATE problems
+                            SET difficulty = ?, frequency = ?, acceptance_rate = ?, link = ?, topics = ?,
+                                version = ?, json = NULL
+                            WHERE id = ?
+                        ''', values + (version, existing[key][0]))
+                        total_updated += 1
                     
-                    except sqlite3.IntegrityError:
-                        total_skipped += 1
+                    company_imported += 1
+                    total_imported += 1
         
         if company_imported > 0:
             companies_processed += 1
             print(f"✓ {company_name}: {company_imported} problems imported")
     
+    # Rows that disappeared from the CSVs leave a tombstone for delta sync
+    removed = [(problem_id, *key, version)
+               for key, (problem_id, _) in existing.items() if key not in seen]
+    if total_imported > 0 and removed:
+        cursor.executemany('''
+            INSERT OR REPLACE INTO problem_tombstones (id, company, duration, title, version)
+            VALUES (?, ?, ?, ?, ?)
+        ''', removed)
+        cursor.executemany('DELETE FROM problems WHERE id = ?', [(row[0],) for row in removed])
+    
+    # Serialized rows that /api/problems concatenates, committed with the rows themselves
+    fill_json_fragments(conn)
     conn.commit()
     
     print("=" * 70)
     print(f"\n📊 Summary:")
     print(f"   Companies processed: {companies_processed}")
     print(f"   Total problems imported: {total_imported}")
+    print(f"   New: {total_inserted}, changed: {total_updated}, removed: {len(removed) if total_imported else 0}")
     print(f"   Duplicates skipped: {total_skipped}")
     
     return total_imported
 
+def fill_json_fragments(conn):
+    """Precompute each new or changed row's /api/problems JSON (as Flask's jsonify writes it)"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, company, duration, difficulty, title, frequency, acceptance_rate, link, topics
+        FROM problems
+        WHERE json IS NULL
+    ''')
+    columns = [description[0] for description in cursor.description]
+    fragments = [
+        (json.dumps(dict(zip(columns, row)), sort_keys=True, separators=(',', ':')), row[0])
+        for row in cursor.fetchall()
+    ]
+    cursor.executemany('UPDATE problems SET json = ? WHERE id = ?', fragments)
+    return len(fragments)
+
+def compute_trends(conn, recent_window='1. Thirty Days', baseline_window='3. Six Months'):
+    """Diff two duration windows per company and globally into the trends table"""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM trends')
+    
+    cursor.execute('''
+        SELECT company, duration, difficulty, title, frequency, link
+        FROM problems
+        WHERE duration IN (?, ?)
+    ''', (recent_window, baseline_window))
+    
+    # (company, title) -> [difficulty, link, recent, baseline]; None means absent
+    per_company = {}
+    for company, duration, difficulty, title, frequency, link in cursor.fetchall():
+        entry = per_company.setdefault((company, title), [difficulty, link, None, None])
+        slot = 2 if duration == recent_window else 3
+        entry[slot] = frequency or 0.0
+    
+    # Global trends compare like with like. Only companies with lists in both windows count
+    # (far fewer have Thirty Days lists), and frequencies are summed over the companies that
+    # list the problem in both windows. A problem no company lists in both windows compares
+    # its mean frequency per list instead, and is new or dropped if only one window lists it.
+    recent_companies = {company for (company, _), values in per_company.items() if values[2] is not None}
+    baseline_companies = {company for (company, _), values in per_company.items() if values[3] is not None}
+    shared = recent_companies & baseline_companies
+    paired = {}
+    unpaired = {}
+    for (company, title), (difficulty, link, recent, baseline) in per_company.items():
+        if company not in shared:
+            continue
+        if recent is not None and baseline is not None:
+            entry = paired.setdefault(title, [difficulty, link, 0.0, 0.0])
+            entry[2] += recent
+            entry[3] += baseline
+        else:
+            entry = unpaired.setdefault(title, [difficulty, link, [], []])
+            entry[2 if recent is not None else 3].append(recent if recent is not None else baseline)
+    overall = {
+        title: [difficulty, link,
+                sum(recent) / len(recent) if recent else None,
+                sum(baseline) / len(baseline) if baseline else None]
+        for title, (difficulty, link, recent, baseline) in unpaired.items()
+    }
+    overall.update(paired)
+    
+    def trend_row(company, title, difficulty, link, recent, baseline):
+        if baseline is None:
+            status = 'new'
+        elif recent is None:
+            status = 'dropped'
+        elif recent > baseline:
+            status = 'rising'
+        elif recent < baseline:
+            status = 'falling'
+        else:
+            status = 'steady'
+        recent = round(recent or 0.0, 4)
+        baseline = round(baseline or 0.0, 4)
+        return (company, title, difficulty, link, recent, baseline, round(recent - baseline, 4), status)
+    
+    rows = [trend_row(company, title, *values) for (company, title), values in per_company.items()]
+    rows.extend(trend_row('all', title, *values) for title, values in overall.items())
+    
+    cursor.executemany('''
+        INSERT INTO trends
+        (company, title, difficulty, link, recent_frequency, baseline_frequency, delta, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    
+    print(f"✓ Trends computed: {len(rows)} rows ({recent_window} vs {baseline_window})")
+    return len(rows)
+
+def next_catalog_version(conn):
+    """Return the version the next import will stamp on changed rows"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT value FROM catalog_meta WHERE key = 'version'")
+    row = cursor.fetchone()
+    previous = int(row[0]) if row else 0
+    return max(previous + 1, int(time.time()))
+
+def stamp_catalog_version(conn, version):
+    """Publish the catalog version so servers rebuild their in-memory indexes"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('version', ?)
+    ''', (str(version),))
+    # Oldest version a delta-sync client can resume from without a full reset
+    cursor.execute('''
+        INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('base_version', ?)
+    ''', (str(version),))
+    conn.commit()
+    return version
+
+def write_company_pages(conn):
+    """Prerender problems.html for every company into company_pages"""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM company_pages')
+    cursor.execute("DELETE FROM catalog_meta WHERE key = 'pages_template'")
+    try:
+        template = read_template()
+        pages = list(render_company_pages(conn, template))
+    except (OSError, ValueError) as e:
+        # Servers fall back to the client-rendered page
+        conn.commit()
+        print(f"⚠️  Skipping prerendered pages: {e}")
+        return 0
+    
+    cursor.executemany('INSERT INTO company_pages (company, html) VALUES (?, ?)', pages)
+    cursor.execute('''
+        INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('pages_template', ?)
+    ''', (template_digest(template),))
+    conn.commit()
+    
+    print(f"✓ Prerendered pages: {len(pages)} ({sum(len(p[1]) for p in pages) / 1e6:.1f} MB gzipped)")
+    return len(pages)
+
+def build_catalog(conn, version, db_path=CATALOG_DB):
+    """Run every import stage; returns (rows imported, {stage: seconds})"""
+    timings = {}
+    def stage(name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[name] = time.perf_counter() - start
+        return result
+    
+    imported = stage('import', import_all_data, conn, version)
+    if imported == 0:
+        return 0, timings
+    
+    # Diff duration windows for /api/trends
+    print("\n📈 Computing trends...")
+    stage('trends', compute_trends, conn)
+    
+    # One row per company problem with a per-window frequency vector
+    stage('consolidated', compute_consolidated, conn)
+    
+    # Topic co-occurrence, company and difficulty tables for /api/analytics/topics
+    stage('topic_analytics', compute_topic_analytics, conn)
+    
+    stamp_catalog_version(conn, version)
+    print(f"✓ Catalog version: {version}")
+    
+    # Columnar snapshot that server workers mmap and share
+    try:
+        rows = stage('snapshot', write_snapshot, conn, snapshot_path(db_path), version)
+        print(f"✓ Catalog snapshot written: {rows} rows")
+    except PermissionError:
+        # Servers notice the stale version and build the filter engine in memory instead
+        print("⚠️  Snapshot not replaced: it is open in a running server (Windows). "
+              "Stop the server and rerun to refresh it.")
+    
+    # problems.html with each company's table inlined, served from memory
+    stage('company_pages', write_company_pages, conn)
+    return imported, timings
+
 def get_database_stats(conn):
     """Display database statistics"""
     cursor = conn.cursor()
@@ -225,18 +588,38 @@ def main():
     print("🚀 DSA Problems Database Initialization")
     print("=" * 70)
     
+    # --refresh re-imports into a copy of the existing database, keeping row ids
+    refresh = '--refresh' in sys.argv[1:]
+    build_path = CATALOG_DB + '.building'
+    if os.path.exists(build_path):
+        os.remove(build_path)
+    
     # Check if database exists
-    db_exists = os.path.exists('dsa_problems.db')
-    if db_exists:
+    db_exists = os.path.exists(CATALOG_DB)
+    if db_exists and not refresh and not sys.stdin.isatty() and catalog_needs_upgrade():
+        # Deploy builds run non-interactively; bring a catalog from an older version up to date
+        print("\n✓ Existing database predates the current schema, upgrading it")
+        refresh = True
+    
+    if db_exists and refresh:
+        # Servers keep reading the current file until the rebuilt one is renamed over it
+        source = sqlite3.connect(CATALOG_DB)
+        target = sqlite3.connect(build_path)
+        source.backup(target)
+        target.close()
+        source.close()
+        print("\n✓ Refreshing a copy of the existing database")
+    elif db_exists:
         # Check if running in interactive terminal
         if sys.stdin.isatty():
             # Interactive mode - ask user
             response = input("\n⚠️  Database already exists. Recreate? (y/N): ").strip().lower()
             if response == 'y':
-                os.remove('dsa_problems.db')
-                print("✓ Old database removed")
+                print("✓ Old database will be replaced")
             else:
                 print("✓ Using existing database")
+                if catalog_needs_upgrade():
+                    print("⚠️  It predates the current schema; run: python init_database.py --refresh")
                 return  # Exit if not recreating
         else:
             # Non-interactive mode (CI/CD, Render, etc.) - use existing database
@@ -246,22 +629,36 @@ def main():
     
     # Create database and schema
     print("\n📦 Creating database schema...")
-    conn = create_database()
+    conn = create_database(build_path)
     print("✓ Database schema created")
     
     # Import data
     print("\n📥 Importing data from CSV files...")
-    imported = import_all_data(conn)
+    version = next_catalog_version(conn)
+    imported, timings = build_catalog(conn, version)
     
     if imported > 0:
+        print("\n⏱️  " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+        
         # Show statistics
         get_database_stats(conn)
+        conn.close()
+        
+        # Publish: new connections open the new file, open ones finish on the old one
+        try:
+            os.replace(build_path, CATALOG_DB)
+        except PermissionError:
+            # Windows refuses to replace a database file that another process has open
+            os.remove(build_path)
+            print(f"\n❌ Could not replace {CATALOG_DB}: it is open in another process.")
+            print("   Stop the server, run this again, then restart the server.")
+            sys.exit(1)
         print("\n✅ Database initialized successfully!")
         print("🎉 You can now run the server with: python server.py")
     else:
+        conn.close()
+        os.remove(build_path)
         print("\n❌ No data was imported. Please check your CSV files.")
-    
-    conn.close()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Leaderboards
+Ranks users by distinct problems solved overall, per company and per
+difficulty. Each board keeps a Fenwick tree over score values plus the users
+at each score, so a progress write, a "my rank" lookup and each step of a
+top-K walk are O(log n). Boards are rebuilt from user_progress once per
+catalog version and then kept current by replaying progress_events, which
+every worker process shares. Problem metadata comes from the catalog
+database; progress, events and usernames from the user database.
+"""
+
+import heapq
+import threading
+
+class FenwickTree:
+    """Counts per score value with O(log n) prefix sums and order statistics"""
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, index, delta):
+        index += 1
+        while index <= self.size:
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index):
+        """Sum of counts for values 0..index"""
+        index = min(index, self.size - 1) + 1
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def find(self, k):
+        """Smallest value whose prefix sum reaches k (k >= 1)"""
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] < k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return pos  # 0-based value
+
+class ScoreBoard:
+    """Users ordered by score; users with no solved problems are not ranked"""
+
+    def __init__(self, size=64):
+        self.scores = {}   # user_id -> score
+        self.buckets = {}  # score -> set of user_ids
+        self.tree = FenwickTree(size)
+        self.total = 0
+
+    def _grow(self, score):
+        size = self.tree.size
+        while size <= score:
+            size *= 2
+        self.tree = FenwickTree(size)
+        for value, users in self.buckets.items():
+            self.tree.add(value, len(users))
+
+    def adjust(self, user_id, delta):
+        """Change a user's score by delta"""
+        old = self.scores.get(user_id, 0)
+        new = old + delta
+        if old > 0:
+            self.buckets[old].discard(user_id)
+            if not self.buckets[old]:
+                del self.buckets[old]
+            self.tree.add(old, -1)
+            self.total -= 1
+        if new > 0:
+            if new >= self.tree.size:
+                self._grow(new)
+            self.scores[user_id] = new
+            self.buckets.setdefault(new, set()).add(user_id)
+            self.tree.add(new, 1)
+            self.total += 1
+        else:
+            self.scores.pop(user_id, None)
+
+    def rank(self, user_id):
+        """(rank, score) for a user, ties sharing a rank; None if unranked"""
+        score = self.scores.get(user_id)
+        if not score:
+            return None
+        return 1 + self.total - self.tree.prefix(score), score
+
+    def top(self, k):
+        """Top k as (rank, user_id, score), ties ordered by user id"""
+        results = []
+        position = 1
+        while len(results) < k and position <= self.total:
+            score = self.tree.find(self.total - position + 1)
+            users = self.buckets[score]
+            for user_id in heapq.nsmallest(k - len(results), users):
+                results.append((position, user_id, score))
+            position += len(users)
+        return results
+
+class Leaderboards:
+    """All boards plus the per-user state needed to apply progress changes"""
+
+    def __init__(self, problems):
+        self.problems = problems  # problem_id -> (company, link, difficulty)
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.boards = {}
+        self.solved = {}               # user_id -> set of solved problem_ids
+        self.link_counts = {}          # user_id -> {link: solved rows}
+        self.company_link_counts = {}  # user_id -> {(company, link): solved rows}
+        self.last_event = None  # None until loaded from user_progress
+
+    def board(self, kind, value=''):
+        key = (kind, value)
+        if key not in self.boards:
+            self.boards[key] = ScoreBoard()
+        return self.boards[key]
+
+    def apply(self, user_id, problem_id, status):
+        """Apply one progress status; replaying an already-applied status is a no-op"""
+        meta = self.problems.get(problem_id)
+        if meta is None:
+            return
+        company, link, difficulty = meta
+        solved = self.solved.setdefault(user_id, set())
+        now_solved = status == 'solved'
+        if now_solved == (problem_id in solved):
+            return
+
+        delta = 1 if now_solved else -1
+        if now_solved:
+            solved.add(problem_id)
+        else:
+            solved.discard(problem_id)
+
+        # A problem counts once per board however many company/duration rows were ticked
+        links = self.link_counts.setdefault(user_id, {})
+        links[link] = links.get(link, 0) + delta
+        if links[link] == (1 if now_solved else 0):
+            self.board('overall').adjust(user_id, delta)
+            self.board('difficulty', difficulty).adjust(user_id, delta)
+
+        company_links = self.company_link_counts.setdefault(user_id, {})
+        key = (company, link)
+        company_links[key] = company_links.get(key, 0) + delta
+        if company_links[key] == (1 if now_solved else 0):
+            self.board('company', company).adjust(user_id, delta)
+
+    def reload(self, conn):
+        """Rebuild every board from user_progress"""
+        self._reset()
+        row = conn.execute('SELECT MAX(id) FROM progress_events').fetchone()
+        self.last_event = row[0] or 0
+        for user_id, problem_id in conn.execute(
+                "SELECT user_id, problem_id FROM user_progress WHERE status = 'solved'"):
+            self.apply(user_id, problem_id, 'solved')
+
+    def sync(self, conn):
+        """Apply progress events written since the last sync (by any worker)"""
+        with self.lock:
+            if self.last_event is None:
+                self.reload(conn)
+                return
+            rows = conn.execute('''
+                SELECT id, user_id, problem_id, status FROM progress_events
+                WHERE id > ? ORDER BY id
+            ''', (self.last_event,)).fetchall()
+            if rows and rows[0][0] > self.last_event + 1:
+                # Events we never saw were pruned; start over from the table
+                self.reload(conn)
+                return
+            for event_id, user_id, problem_id, status in rows:
+                self.apply(user_id, problem_id, status)
+                self.last_event = event_id
+
+def build_leaderboards(conn):
+    """Load problem metadata from the catalog; boards are filled on the first sync"""
+    problems = {row[0]: (row[1], row[2], row[3]) for row in
+                conn.execute('SELECT id, company, link, difficulty FROM problems')}
+    return Leaderboards(problems)
+
+def leaderboard_response(leaderboards, conn, kind, value, limit, user_id=None):
+    """Top-K (with usernames) and the caller's own rank for one board (conn: user database)"""
+    if kind not in ('overall', 'company', 'difficulty'):
+        raise ValueError("board must be 'overall', 'company' or 'difficulty'")
+    if kind != 'overall' and not value:
+        raise ValueError(f'{kind} board needs a value')
+    value = value if kind != 'overall' else ''
+
+    leaderboards.sync(conn)
+    with leaderboards.lock:
+        board = leaderboards.boards.get((kind, value)) or ScoreBoard()
+        top = board.top(max(1, min(limit, 100)))
+        mine = board.rank(user_id) if user_id else None
+        ranked_users = board.total
+
+    names = {}
+    if top:
+        ids = [user for _, user, _ in top]
+        placeholders = ','.join('?' * len(ids))
+        names = dict(conn.execute(f'SELECT id, username FROM users WHERE id IN ({placeholders})', ids).fetchall())
+
+    return {
+        'board': kind,
+        'value': value,
+        'ranked_users': ranked_users,
+        'top': [{'rank': rank, 'username': names.get(user), 'score': score} for rank, user, score in top],
+        'me': {'rank': mine[0], 'score': mine[1]} if mine else None
+    }
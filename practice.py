@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Practice Set Sampler
+Draws random practice sets where each problem's chance is proportional to its
+frequency in a company's duration window. Every (company, duration,
+difficulty) slice gets a Walker alias table once per catalog version, so a
+draw is O(1) and no query ever needs ORDER BY RANDOM(). Problems the user has
+already solved (under any window) are skipped.
+"""
+
+import heapq
+import random
+
+DEFAULT_SET_SIZE = 5
+MAX_SET_SIZE = 50
+MIN_WEIGHT = 0.1  # problems without a frequency can still be drawn, rarely
+
+class AliasTable:
+    """Walker/Vose alias table: O(n) build, O(1) weighted draw"""
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, w in enumerate(scaled) if w < 1.0]
+        large = [i for i, w in enumerate(scaled) if w >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Leftovers are 1.0 up to float rounding
+
+    def sample(self, rng=random):
+        """Index drawn with probability proportional to its weight"""
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+class PracticeSlice:
+    """Problems of one (company, duration, difficulty) slice and their alias table"""
+
+    def __init__(self, problems):
+        self.problems = problems
+        self.weights = [max(p['frequency'] or 0.0, MIN_WEIGHT) for p in problems]
+        self.table = AliasTable(self.weights)
+
+    def draw(self, n, excluded_links=(), rng=random):
+        """Up to n distinct problems, frequency-weighted, skipping excluded links"""
+        picked = []
+        seen = set()
+        # Rejection keeps draws O(1) while exclusions are a small share of the slice
+        attempts = 4 * n + 32
+        while len(picked) < n and attempts:
+            attempts -= 1
+            i = self.table.sample(rng)
+            if i in seen or self.problems[i]['link'] in excluded_links:
+                continue
+            seen.add(i)
+            picked.append(i)
+
+        if len(picked) < n:
+            # Mostly solved or exhausted: finish with exact weighted sampling over what is left
+            rest = [i for i in range(len(self.problems))
+                    if i not in seen and self.problems[i]['link'] not in excluded_links]
+            picked.extend(heapq.nlargest(n - len(picked), rest,
+                                         key=lambda i: rng.random() ** (1.0 / self.weights[i])))
+        return [self.problems[i] for i in picked]
+
+class PracticeIndex:
+    """Alias-table slices per (company, duration, difficulty), difficulty 'all' included"""
+
+    def __init__(self, slices, links):
+        self.slices = slices  # (company, duration, difficulty) -> PracticeSlice
+        self.links = links    # problem id -> link, to exclude solved problems across windows
+
+    def solved_links(self, problem_ids):
+        """Links of the given (solved) problem ids"""
+        return {self.links[pid] for pid in problem_ids if pid in self.links}
+
+    def draw(self, company, duration, difficulty, n, excluded_links=(), rng=random):
+        """A practice set, or None if the slice does not exist"""
+        practice_slice = self.slices.get((company, duration, difficulty))
+        if practice_slice is None:
+            return None
+        return practice_slice.draw(max(1, min(n, MAX_SET_SIZE)), excluded_links, rng)
+
+def solved_problem_ids(conn, user_id):
+    """Problem ids the user marked solved (conn: user database)"""
+    rows = conn.execute("SELECT problem_id FROM user_progress WHERE user_id = ? AND status = 'solved'",
+                        (user_id,)).fetchall()
+    return [row[0] for row in rows]
+
+def build_practice_index(conn):
+    """Group the catalog into slices and build an alias table for each"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, company, duration, difficulty, title, frequency, acceptance_rate, link, topics
+        FROM problems
+    ''')
+
+    grouped = {}
+    links = {}
+    for row in cursor.fetchall():
+        problem = {
+            'id': row[0],
+            'company': row[1],
+            'duration': row[2],
+            'difficulty': row[3],
+            'title': row[4],
+            'frequency': row[5],
+            'acceptance_rate': row[6],
+            'link': row[7],
+            'topics': row[8]
+        }
+        links[row[0]] = row[7]
+        grouped.setdefault((row[1], row[2], row[3]), []).append(problem)
+        grouped.setdefault((row[1], row[2], 'all'), []).append(problem)
+
+    return PracticeIndex({key: PracticeSlice(problems) for key, problems in grouped.items()}, links)
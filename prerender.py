@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Prerendered Company Pages
+Renders problems.html once per company at import time with the problem
+table, counts and the company's rows (as /api/problems returns them) inlined,
+and stores the pages gzip-compressed in the catalog. Servers keep them in
+memory and answer problems.html?company= with one response and no query; the
+page's own script applies any duration= window client-side and hydrates it
+with the user's statuses.
+"""
+
+import os
+import gzip
+import html
+import sqlite3
+import hashlib
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'problems.html')
+DURATIONS = ['1. Thirty Days', '2. Three Months', '3. Six Months', '4. More Than Six Months', '5. All']
+ALL_DURATIONS = '5. All'
+
+def template_digest(template):
+    """Identifies the problems.html the pages were rendered from"""
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()
+
+def read_template(path=TEMPLATE_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def render_row(problem):
+    """One table row, the same markup renderProblems() produces for an unsolved problem"""
+    frequency = f"{float(problem['frequency']):.1f}" if problem['frequency'] else 'N/A'
+    acceptance_rate = (f"{float(problem['acceptance_rate']) * 100:.1f}%"
+                       if problem['acceptance_rate'] else 'N/A')
+    difficulty = html.escape(problem['difficulty'])
+    problem_id = int(problem['id'])
+    buttons = ''.join(
+        f'<button class="status-btn {status}{" active" if status == "unsolved" else ""}" '
+        f'onclick="setStatus({problem_id}, \'{status}\')">{label}</button>'
+        for status, label in (('solved', '✓'), ('tried', '~'), ('unsolved', '✗'))
+    )
+    return (
+        f'<tr><td><span class="difficulty {difficulty}">{difficulty}</span></td>'
+        f'<td><strong>{html.escape(problem["title"])}</strong></td>'
+        f'<td>{frequency}</td>'
+        f'<td>{acceptance_rate}</td>'
+        f'<td><a href="{html.escape(problem["link"])}" target="_blank" class="link-btn">Solve →</a></td>'
+        f'<td><div class="status-buttons">{buttons}</div></td></tr>'
+    )
+
+def render_page(template, company, duration, problems, problems_json):
+    """Fill the problems.html template for one company and duration window"""
+    visible = [p for p in problems if duration == ALL_DURATIONS or p['duration'] == duration]
+    # Inline JSON must not be able to close the <script> element
+    data = problems_json.replace('</', '<\\/')
+
+    replacements = [
+        ('<title>DSA Problems - Company</title>', f'<title>DSA Problems - {html.escape(company)}</title>'),
+        ('<h1 id="companyName">📚 Company Problems</h1>', f'<h1 id="companyName">📚 {html.escape(company)}</h1>'),
+        ('<h3 id="totalCount">0</h3>', f'<h3 id="totalCount">{len(problems)}</h3>'),
+        ('<h3 id="unsolvedCount">0</h3>', f'<h3 id="unsolvedCount">{len(problems)}</h3>'),
+        (f'<option value="{duration}">', f'<option value="{duration}" selected>'),
+        ('<div id="loading">', '<div id="loading" style="display: none;">'),
+        ('<div class="problems-container" style="display: none;">', '<div class="problems-container">'),
+        ('<span id="problemsCount">0</span>', f'<span id="problemsCount">{len(visible)}</span>'),
+        ('<tbody id="problemsBody"></tbody>',
+         '<tbody id="problemsBody">' + ''.join(render_row(p) for p in visible) + '</tbody>'),
+        ('    <script>\n',
+         f'    <script id="prerenderedProblems" type="application/json">{data}</script>\n    <script>\n'),
+    ]
+    page = template
+    for old, new in replacements:
+        if page.count(old) != 1:
+            raise ValueError(f'problems.html no longer contains {old.strip()!r} exactly once')
+        page = page.replace(old, new)
+    return page
+
+def render_company_pages(conn, template):
+    """Yield (company, gzipped page) for every company, rendered for the All window"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, company, duration, difficulty, title, frequency, acceptance_rate, link, json
+        FROM problems
+        ORDER BY company, difficulty, title
+    ''')
+    companies = {}
+    for row in cursor.fetchall():
+        companies.setdefault(row[1], []).append(row)
+
+    for company, rows in companies.items():
+        problems = [{
+            'id': row[0], 'duration': row[2], 'difficulty': row[3], 'title': row[4],
+            'frequency': row[5], 'acceptance_rate': row[6], 'link': row[7]
+        } for row in rows]
+        problems_json = '[' + ','.join(row[8] for row in rows) + ']'
+        page = render_page(template, company, ALL_DURATIONS, problems, problems_json)
+        yield company, gzip.compress(page.encode('utf-8'), compresslevel=9, mtime=0)
+
+def page_etag(digest, compressed):
+    """Distinct strong ETags for the gzip and identity representations of a page"""
+    return f'"{digest}-gzip"' if compressed else f'"{digest}"'
+
+class PageCache:
+    """Prerendered pages held in memory, keyed by company"""
+
+    def __init__(self, pages):
+        self.pages = pages  # company -> (gzipped bytes, sha1 of those bytes)
+
+    def get(self, company, duration=None):
+        """(gzipped page, digest) or None when the page was not prerendered"""
+        if duration and duration not in DURATIONS:
+            return None
+        return self.pages.get(company)
+
+def build_page_cache(conn):
+    """Load the prerendered pages, unless problems.html changed since they were rendered"""
+    try:
+        row = conn.execute("SELECT value FROM catalog_meta WHERE key = 'pages_template'").fetchone()
+        if not row or row[0] != template_digest(read_template()):
+            return PageCache({})
+        rows = conn.execute('SELECT company, html FROM company_pages').fetchall()
+    except (OSError, sqlite3.Error):
+        return PageCache({})
+    return PageCache({company: (bytes(page), hashlib.sha1(page).hexdigest()) for company, page in rows})
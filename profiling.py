@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+On-Demand Request Profiling
+Profiles selected requests with cProfile plus a lightweight stack sampler and
+writes <route>-<time>-<pid>.pstats and .collapsed (flamegraph input) files to
+DSA_PROFILE_DIR. A request is profiled when it carries X-Profile: <token>, or
+when its route was armed through the admin endpoint for the next N requests
+or a sampled fraction. With DSA_PROFILE_DIR unset nothing is ever checked.
+"""
+
+import os
+import sys
+import hmac
+import time
+import random
+import cProfile
+import threading
+from collections import Counter
+
+PROFILE_DIR = os.environ.get('DSA_PROFILE_DIR', '')
+PROFILE_TOKEN = os.environ.get('DSA_PROFILE_TOKEN', '')
+SAMPLE_INTERVAL = 0.001  # seconds between stack samples
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+class ProfileSession:
+    """cProfile and stack sampler running for one request"""
+
+    def __init__(self, profiler, route):
+        self.profiler = profiler
+        self.route = route
+        self.cprofile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident())
+        self.sampler.start()
+        self.cprofile.enable()
+
+    def stop(self):
+        """Stop profiling and write the .pstats and .collapsed files"""
+        self.cprofile.disable()
+        self.sampler.stop()
+        try:
+            os.makedirs(self.profiler.output_dir, exist_ok=True)
+            slug = self.route.strip('/').replace('/', '_') or 'root'
+            base = os.path.join(self.profiler.output_dir, f"{slug}-{int(time.time() * 1000)}-{os.getpid()}")
+            self.cprofile.dump_stats(base + '.pstats')
+            with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+                for stack, count in self.sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            return base
+        finally:
+            self.profiler._running.release()
+
+class Profiler:
+    """Decides which requests to profile; inert unless an output directory is set"""
+
+    def __init__(self, output_dir=PROFILE_DIR, token=PROFILE_TOKEN):
+        self.output_dir = output_dir
+        self.token = token
+        self.enabled = bool(output_dir)
+        self._armed = {}  # route -> [remaining requests, sample rate]
+        self._lock = threading.Lock()
+        self._running = threading.Lock()  # one profile at a time per process
+
+    def authorized(self, token):
+        """Whether a request presented the profiling token"""
+        return bool(self.enabled and self.token and token and hmac.compare_digest(token, self.token))
+
+    def arm(self, route, requests=1, sample_rate=1.0):
+        """Profile up to `requests` upcoming requests to route, each with probability sample_rate"""
+        with self._lock:
+            if requests > 0:
+                self._armed[route] = [requests, max(0.0, min(sample_rate, 1.0))]
+            else:
+                self._armed.pop(route, None)
+            return self.status()
+
+    def status(self):
+        """Armed routes and their remaining budgets"""
+        return {route: {'remaining': remaining, 'sample_rate': rate}
+                for route, (remaining, rate) in self._armed.items()}
+
+    def _take(self, route):
+        if not self._armed:
+            return False
+        with self._lock:
+            armed = self._armed.get(route)
+            if not armed or random.random() >= armed[1]:
+                return False
+            armed[0] -= 1
+            if armed[0] <= 0:
+                del self._armed[route]
+            return True
+
+    def start(self, route, header_token=None):
+        """Start a ProfileSession if this request should be profiled, else return None"""
+        if not (self.authorized(header_token) or self._take(route)):
+            return None
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            return ProfileSession(self, route)
+        except Exception:
+            self._running.release()
+            raise
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+User Progress
+Reads and writes per-user problem statuses in user_progress. Every write also
+appends to progress_events so in-memory structures in each worker process
+(leaderboards) can catch up incrementally instead of rescanning the table.
+Writes go through the write-behind queue as one unit, so the status, its event
+and the review queue entry (added when solved, removed otherwise) commit
+together or not at all.
+"""
+
+from review import track_solved
+from write_behind import WRITE_TIMEOUT
+
+PROGRESS_STATUSES = ('solved', 'tried', 'unsolved')
+EVENT_RETENTION = 100000  # progress_events rows kept; lagging workers fall back to a full rebuild
+PRUNE_EVERY = 1000
+
+def load_progress(conn, user_id, company=None):
+    """Return {problem_id: status} for a user, optionally for one company"""
+    if company:
+        rows = conn.execute('''
+            SELECT problem_id, status FROM user_progress
+            WHERE user_id = ? AND company = ?
+        ''', (user_id, company)).fetchall()
+    else:
+        rows = conn.execute('SELECT problem_id, status FROM user_progress WHERE user_id = ?',
+                            (user_id,)).fetchall()
+    return {str(problem_id): status for problem_id, status in rows}
+
+def save_progress(write_queue, catalog_conn, user_id, problem_id, status):
+    """Validate and durably record a status change; returns its progress event id"""
+    if status not in PROGRESS_STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(PROGRESS_STATUSES)}")
+    try:
+        problem_id = int(problem_id)
+    except (TypeError, ValueError):
+        raise ValueError('problem_id must be an integer')
+
+    row = catalog_conn.execute('SELECT company FROM problems WHERE id = ?', (problem_id,)).fetchone()
+    if row is None:
+        raise ValueError('Unknown problem')
+
+    # The event insert comes last so the unit's result is its id
+    event_id = write_queue.submit_unit([
+        ('''
+            INSERT INTO user_progress (user_id, problem_id, company, status, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(user_id, problem_id) DO UPDATE
+            SET status = excluded.status, updated_at = excluded.updated_at
+        ''', (user_id, problem_id, row[0], status)),
+        track_solved(user_id, problem_id, status == 'solved'),
+        ('''
+            INSERT INTO progress_events (user_id, problem_id, status)
+            VALUES (?, ?, ?)
+        ''', (user_id, problem_id, status))
+    ]).result(WRITE_TIMEOUT)
+
+    if event_id % PRUNE_EVERY == 0:
+        write_queue.submit('DELETE FROM progress_events WHERE id <= ?', (event_id - EVENT_RETENTION,))
+    return event_id
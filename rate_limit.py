@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Admission Control
+Token-bucket rate limiting per client IP and per user for each endpoint
+class, with LRU eviction of idle buckets to keep memory bounded, plus a
+process-wide cap on concurrent password-hashing (PBKDF2) work.
+"""
+
+import os
+import math
+import time
+import ipaddress
+import threading
+from functools import lru_cache
+from collections import OrderedDict
+
+def _env_float(name, default):
+    """Read a float setting from the environment"""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+# Endpoint class -> (bucket capacity, refill tokens per second)
+DEFAULT_LIMITS = {
+    'auth': (5, 0.2),      # login / register: burst of 5, then one every 5 seconds
+    'heavy': (10, 1.0)     # unfiltered catalog listings, batches, change feeds and exports
+}
+
+def endpoint_class(path, company=None):
+    """Rate-limit class for a request, or None for cheap reads that are never limited"""
+    if path in ('/api/login', '/api/register'):
+        return 'auth'
+    if path in ('/api/export', '/api/catalog/changes', '/api/problems/batch'):
+        return 'heavy'
+    if path == '/api/problems' and (company or 'all') == 'all':
+        return 'heavy'
+    return None
+
+def batch_cost(data):
+    """Tokens a /api/problems/batch body costs: one per spec without a company filter"""
+    specs = data.get('queries') if isinstance(data, dict) else None
+    if not isinstance(specs, list):
+        return 1  # rejected with 400 by the handler; charge like a single request
+    return sum(1 for spec in specs
+               if not isinstance(spec, dict) or str(spec.get('company', 'all')) == 'all')
+
+@lru_cache(maxsize=8)
+def parse_trusted_proxies(setting):
+    """Networks from a comma-separated list of proxy IPs or CIDRs"""
+    networks = []
+    for entry in setting.split(','):
+        try:
+            networks.append(ipaddress.ip_network(entry.strip(), strict=False))
+        except ValueError:
+            continue
+    return tuple(networks)
+
+def is_trusted_proxy(addr, proxies):
+    """Whether an address falls in one of the trusted proxy networks"""
+    try:
+        ip = ipaddress.ip_address(addr)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+def client_ip(remote_addr, forwarded_for=None):
+    """Client address; X-Forwarded-For only counts when the peer is in DSA_TRUSTED_PROXIES"""
+    proxies = parse_trusted_proxies(os.environ.get('DSA_TRUSTED_PROXIES', ''))
+    if not forwarded_for or not is_trusted_proxy(remote_addr, proxies):
+        return remote_addr
+    # Walk back through the proxies; the first hop they did not add is the client
+    hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop, proxies):
+            return hop
+    return hops[0] if hops else remote_addr
+
+def load_limits():
+    """Endpoint class limits, with DSA_RATE_<CLASS> environment overrides"""
+    limits = dict(DEFAULT_LIMITS)
+    for name in limits:
+        override = os.environ.get(f'DSA_RATE_{name.upper()}')
+        if override and '/' in override:
+            capacity, rate = override.split('/', 1)
+            try:
+                limits[name] = (float(capacity), float(rate))
+            except ValueError:
+                pass
+    return limits
+
+class RateLimiter:
+    """Token buckets keyed by (endpoint class, client key), LRU-bounded"""
+
+    def __init__(self, limits=None, max_buckets=10000):
+        self.limits = limits or load_limits()
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # (endpoint class, key) -> [tokens, last refill time]
+        self._lock = threading.Lock()
+
+    def enabled(self):
+        """Rate limiting can be switched off with DSA_RATE_LIMIT=0"""
+        return os.environ.get('DSA_RATE_LIMIT', '1').lower() not in ('0', 'false', 'no')
+
+    def check(self, endpoint_class, *keys, cost=1):
+        """Take cost tokens from every key's bucket; return 0 if allowed, else seconds to wait"""
+        if not self.enabled():
+            return 0
+        if endpoint_class not in self.limits or cost <= 0:
+            return 0
+        capacity, rate = self.limits[endpoint_class]
+        cost = min(cost, capacity)  # a request larger than the burst waits for a full bucket
+        now = time.monotonic()
+        with self._lock:
+            buckets = []
+            for key in keys:
+                if key is None:
+                    continue
+                bucket_key = (endpoint_class, key)
+                bucket = self._buckets.get(bucket_key)
+                if bucket is None:
+                    bucket = [capacity, now]
+                    self._buckets[bucket_key] = bucket
+                else:
+                    self._buckets.move_to_end(bucket_key)
+                    bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                    bucket[1] = now
+                buckets.append(bucket)
+
+            # Evict the least recently used buckets; an evicted bucket just restarts full
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+
+            short = [bucket for bucket in buckets if bucket[0] < cost]
+            if short:
+                return max((cost - bucket[0]) / rate for bucket in short)
+            for bucket in buckets:
+                bucket[0] -= cost
+            return 0
+
+def retry_after_header(wait):
+    """Whole seconds for a Retry-After header"""
+    return str(max(1, math.ceil(wait)))
+
+class ConcurrencyCap:
+    """Bounded semaphore for CPU-heavy work such as password hashing"""
+
+    def __init__(self, limit=None, timeout=None):
+        self.limit = int(limit or _env_float('DSA_KDF_CONCURRENCY', 2))
+        self.timeout = timeout if timeout is not None else _env_float('DSA_KDF_WAIT', 2.0)
+        self._semaphore = threading.BoundedSemaphore(self.limit)
+
+    def __enter__(self):
+        if not self._semaphore.acquire(timeout=self.timeout):
+            raise ServerBusy('Server is busy, please retry shortly')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
+
+class ServerBusy(Exception):
+    """Raised when admission control sheds a request"""
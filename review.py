@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Spaced-Repetition Review Queue
+SM-2 scheduling for solved problems. Each (user, problem) row in
+review_schedule carries its next due time, and the (user_id, due_at) index
+makes "next N due" an index seek plus N steps instead of a scan over every
+solved problem. Marking a problem solved schedules its first review; moving
+it back to tried/unsolved drops it from the queue.
+"""
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+FIRST_INTERVAL = 1   # days
+SECOND_INTERVAL = 6  # days
+MAX_DUE = 100
+
+def next_schedule(quality, repetitions, interval_days, ease):
+    """SM-2 step for a 0-5 recall grade; returns (repetitions, interval_days, ease)"""
+    if quality < 3:
+        repetitions = 0
+        interval_days = FIRST_INTERVAL
+    else:
+        if repetitions == 0:
+            interval_days = FIRST_INTERVAL
+        elif repetitions == 1:
+            interval_days = SECOND_INTERVAL
+        else:
+            interval_days = max(1, round(interval_days * ease))
+        repetitions += 1
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return repetitions, interval_days, round(ease, 2)
+
+def track_solved(user_id, problem_id, solved):
+    """The schedule change for a status write, as a (sql, params) statement"""
+    if solved:
+        return ('''
+            INSERT OR IGNORE INTO review_schedule (user_id, problem_id, due_at, ease)
+            VALUES (?, ?, datetime('now', ?), ?)
+        ''', (user_id, problem_id, f'+{FIRST_INTERVAL} day', DEFAULT_EASE))
+    return ('DELETE FROM review_schedule WHERE user_id = ? AND problem_id = ?',
+            (user_id, problem_id))
+
+def schedule_from_row(row):
+    """Convert a review_schedule/problems row to a dictionary"""
+    return {
+        'problem_id': row['problem_id'],
+        'company': row['company'],
+        'title': row['title'],
+        'difficulty': row['difficulty'],
+        'link': row['link'],
+        'due_at': row['due_at'],
+        'interval_days': row['interval_days'],
+        'ease': row['ease'],
+        'repetitions': row['repetitions'],
+        'last_reviewed_at': row['last_reviewed_at']
+    }
+
+def due_reviews(conn, user_id, limit=20):
+    """The user's next `limit` due reviews, oldest first, and when the next one after them falls due
+
+    conn is a user-database connection with the catalog attached as `catalog`.
+    """
+    limit = max(1, min(limit, MAX_DUE))
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT r.problem_id, r.due_at, r.interval_days, r.ease, r.repetitions, r.last_reviewed_at,
+               p.company, p.title, p.difficulty, p.link
+        FROM review_schedule r
+        JOIN catalog.problems p ON p.id = r.problem_id
+        WHERE r.user_id = ? AND r.due_at <= datetime('now')
+        ORDER BY r.due_at
+        LIMIT ?
+    ''', (user_id, limit))
+    due = [schedule_from_row(row) for row in cursor.fetchall()]
+
+    cursor.execute('''
+        SELECT MIN(due_at) FROM review_schedule
+        WHERE user_id = ? AND due_at > datetime('now')
+    ''', (user_id,))
+    return {'due': due, 'next_due_at': cursor.fetchone()[0]}
+
+def record_review(write_queue, conn, user_id, problem_id, quality):
+    """Grade one review (0-5) and push its next due time out; returns the new schedule"""
+    try:
+        problem_id = int(problem_id)
+        quality = int(quality)
+    except (TypeError, ValueError):
+        raise ValueError('quality must be an integer from 0 to 5')
+    if not 0 <= quality <= 5:
+        raise ValueError('quality must be an integer from 0 to 5')
+
+    row = conn.execute('''
+        SELECT repetitions, interval_days, ease FROM review_schedule
+        WHERE user_id = ? AND problem_id = ?
+    ''', (user_id, problem_id)).fetchone()
+    if row is None:
+        raise LookupError('Problem is not in your review queue (mark it solved first)')
+
+    repetitions, interval_days, ease = next_schedule(quality, row[0], row[1], row[2])
+    reviewed_at, due_at = conn.execute("SELECT datetime('now'), datetime('now', ?)",
+                                       (f'+{interval_days} day',)).fetchone()
+    write_queue.execute('''
+        UPDATE review_schedule
+        SET repetitions = ?, interval_days = ?, ease = ?, due_at = ?, last_reviewed_at = ?
+        WHERE user_id = ? AND problem_id = ?
+    ''', (repetitions, interval_days, ease, due_at, reviewed_at, user_id, problem_id))
+
+    return {
+        'problem_id': problem_id,
+        'quality': quality,
+        'repetitions': repetitions,
+        'interval_days': interval_days,
+        'ease': ease,
+        'due_at': due_at
+    }
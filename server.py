@@ -5,6 +5,7 @@ Serves the web application and provides database-backed API endpoints
 """
 
 import os
+import gzip
 import json
 import sqlite3
 import traceback
@@ -13,13 +14,50 @@ import secrets
 from datetime import datetime, timedelta
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
+from catalog_cache import get_cached, connect_catalog, catalog_uri
+from study_plan import build_plan_index, build_plan
+from suggest import build_suggest_index
+from prerender import build_page_cache, page_etag
+from practice import DEFAULT_SET_SIZE, build_practice_index, solved_problem_ids
+from consolidated import window_bit
+from columnar import build_columnar_encoder
+from topic_analytics import topic_analytics, DEFAULT_LIMIT as TOPIC_LIMIT, MAX_LIMIT as MAX_TOPIC_LIMIT
+from progress import load_progress, save_progress
+from review import due_reviews, record_review
+from leaderboard import build_leaderboards, leaderboard_response
+from filter_engine import filter_engine_enabled, build_filter_engine, escape_like
+from export import EXPORT_FORMATS, iter_export, gzip_stream, accepts_gzip
+from write_behind import WriteBehindQueue, WriteQueueFull
+from profiling import Profiler
+from rate_limit import RateLimiter, ConcurrencyCap, ServerBusy, endpoint_class, batch_cost, client_ip, retry_after_header
+
+# Upper bound on filter specs accepted by /api/problems/batch
+MAX_BATCH_QUERIES = 50
 
 class DSAServerHandler(SimpleHTTPRequestHandler):
+    write_queue = None  # WriteBehindQueue, set up by run_server
+    rate_limiter = RateLimiter()
+    kdf_cap = ConcurrencyCap()
+    profiler = Profiler()
+    
+    def get_db_path(self):
+        """Get catalog database file path"""
+        return os.path.join(os.getcwd(), 'dsa_problems.db')
+    
+    def get_user_db_path(self):
+        """Get user database file path (DSA_USER_DB overrides the default)"""
+        return os.environ.get('DSA_USER_DB', os.path.join(os.getcwd(), 'dsa_users.db'))
+    
     def get_db_connection(self):
-        """Get database connection"""
-        db_path = os.path.join(os.getcwd(), 'dsa_problems.db')
-        conn = sqlite3.connect(db_path)
+        """Get read-only catalog database connection"""
+        return connect_catalog(self.get_db_path())
+    
+    def get_user_db_connection(self, attach_catalog=False):
+        """Get user database connection; attach the catalog only for queries that join it"""
+        conn = sqlite3.connect(self.get_user_db_path(), timeout=30, uri=True)
         conn.row_factory = sqlite3.Row
+        if attach_catalog:
+            conn.execute('ATTACH DATABASE ? AS catalog', (catalog_uri(self.get_db_path()),))
         return conn
     
     def send_json_response(self, data):
@@ -30,10 +68,54 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(json.dumps(data).encode('utf-8'))
     
-    def send_json_error(self, code, message):
+    def send_json_bytes(self, body):
+        """Helper to send an already-serialized JSON body"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_company_page(self, query):
+        """Send a prerendered problems.html from memory; False if there is none for this request"""
+        params = parse_qs(query)
+        company = params.get('company', [''])[0]
+        if not company:
+            return False
+        pages = get_cached(self.get_db_path(), 'company_pages', build_page_cache)
+        page = pages.get(company, params.get('duration', [None])[0])
+        if not page:
+            return False
+        
+        body, digest = page
+        compressed = accepts_gzip(self.headers.get('Accept-Encoding'))
+        etag = page_etag(digest, compressed)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return True
+        
+        if not compressed:
+            body = gzip.decompress(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+    
+    def send_json_error(self, code, message, retry_after=None):
         """Helper to send JSON error response"""
         self.send_response(code)
         self.send_header('Content-Type', 'application/json')
+        if retry_after is not None:
+            self.send_header('Retry-After', str(retry_after))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
         self.wfile.write(json.dumps({'error': message}).encode('utf-8'))
@@ -42,7 +124,8 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
         """Hash password with salt"""
         if salt is None:
             salt = secrets.token_hex(16)
-        pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
+        with self.kdf_cap:
+            pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
         return pwd_hash.hex(), salt
     
     def verify_session(self, token):
@@ -51,7 +134,7 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
             return None
         
         try:
-            conn = self.get_db_connection()
+            conn = self.get_user_db_connection()
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT user_id FROM sessions 
@@ -64,18 +147,123 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
             print(f"Session verification error: {e}")
             return None
     
+    def build_problem_filters(self, company='all', duration='5. All', difficulty='all', search='', topic=''):
+        """Build the WHERE clause and parameters for the problem filters"""
+        where = '1=1'
+        params = []
+        
+        if company != 'all':
+            where += ' AND company = ?'
+            params.append(company)
+        
+        if duration != '5. All':
+            where += ' AND duration = ?'
+            params.append(duration)
+        
+        if difficulty != 'all':
+            where += ' AND difficulty = ?'
+            params.append(difficulty)
+        
+        if search:
+            where += " AND title LIKE ? ESCAPE '\\'"
+            params.append(f"%{escape_like(search)}%")
+        
+        if topic:
+            where += " AND (', ' || topics || ',') LIKE ? ESCAPE '\\'"
+            params.append(f"%, {escape_like(topic)},%")
+        
+        return where, params
+    
+    def problem_from_row(self, row):
+        """Convert a problems row to its API dictionary"""
+        return {
+            'id': row['id'],
+            'company': row['company'],
+            'duration': row['duration'],
+            'difficulty': row['difficulty'],
+            'title': row['title'],
+            'frequency': row['frequency'],
+            'acceptance_rate': row['acceptance_rate'],
+            'link': row['link'],
+            'topics': row['topics']
+        }
+    
     def read_post_data(self):
-        """Read and parse POST data"""
-        content_length = int(self.headers.get('Content-Length', 0))
-        if content_length == 0:
-            return {}
-        post_data = self.rfile.read(content_length)
-        return json.loads(post_data.decode('utf-8'))
+        """Read and parse POST data (cached, the body can only be read once)"""
+        if not hasattr(self, '_post_data'):
+            # Cache a parse failure too, so a second call never blocks re-reading the stream
+            try:
+                content_length = int(self.headers.get('Content-Length', 0))
+                post_data = self.rfile.read(content_length) if content_length > 0 else b''
+                self._post_data = json.loads(post_data.decode('utf-8')) if post_data else {}
+            except ValueError as e:
+                self._post_data = e
+        if isinstance(self._post_data, ValueError):
+            raise self._post_data
+        return self._post_data
+    
+    def reject_if_rate_limited(self, path, query):
+        """Send 429 with Retry-After and return True when the client is over its limit"""
+        params = parse_qs(query)
+        limit_class = endpoint_class(path, params.get('company', [None])[0])
+        if limit_class is None:
+            return False
+        
+        ip = client_ip(self.client_address[0], self.headers.get('X-Forwarded-For'))
+        user = None
+        cost = 1
+        if path == '/api/problems/batch':
+            try:
+                cost = batch_cost(self.read_post_data())
+            except ValueError:
+                pass
+        if limit_class == 'auth':
+            try:
+                data = self.read_post_data()
+            except ValueError:
+                data = {}
+            username = data.get('username') if isinstance(data, dict) else None
+            user = f"user:{str(username).strip().lower()}" if username else None
+        else:
+            token = self.headers.get('Authorization', '').replace('Bearer ', '')
+            user = f"session:{token}" if token else None
+        
+        wait = self.rate_limiter.check(limit_class, f"ip:{ip}", user, cost=cost)
+        if not wait:
+            return False
+        
+        self.send_response(429)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Retry-After', retry_after_header(wait))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(json.dumps({'error': 'Too many requests, please slow down'}).encode('utf-8'))
+        return True
+    
+    def run_profiled(self, handler):
+        """Run a request handler, profiling it when requested (no-op unless DSA_PROFILE_DIR is set)"""
+        if not self.profiler.enabled:
+            return handler()
+        session = self.profiler.start(urlparse(self.path).path, self.headers.get('X-Profile'))
+        try:
+            return handler()
+        finally:
+            if session is not None:
+                session.stop()
     
     def do_GET(self):
+        self.run_profiled(self.route_GET)
+    
+    def do_POST(self):
+        self.run_profiled(self.route_POST)
+    
+    def route_GET(self):
         parsed_url = urlparse(self.path)
         path = parsed_url.path
         
+        if self.reject_if_rate_limited(path, parsed_url.query):
+            return
+        
         # API: Get all companies
         if path == '/api/companies':
             try:
@@ -96,58 +284,121 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
         elif path == '/api/problems':
             try:
                 params = parse_qs(parsed_url.query)
+                filters = (
+                    params.get('company', ['all'])[0],
+                    params.get('duration', ['5. All'])[0],
+                    params.get('difficulty', ['all'])[0],
+                    params.get('search', [''])[0],
+                    params.get('topic', [''])[0]
+                )
+                view = params.get('view', ['rows'])[0]
+                fmt = params.get('format', ['json'])[0]
                 
-                conn = self.get_db_connection()
-                cursor = conn.cursor()
-                
-                # Build query with filters
-                query = 'SELECT * FROM problems WHERE 1=1'
-                query_params = []
-                
-                if 'company' in params and params['company'][0] != 'all':
-                    query += ' AND company = ?'
-                    query_params.append(params['company'][0])
+                if view not in ('rows', 'consolidated'):
+                    self.send_json_error(400, "view must be 'rows' or 'consolidated'")
+                    return
+                if fmt not in ('json', 'columnar'):
+                    self.send_json_error(400, "format must be 'json' or 'columnar'")
+                    return
                 
-                if 'duration' in params and params['duration'][0] != '5. All':
-                    query += ' AND duration = ?'
-                    query_params.append(params['duration'][0])
+                # Dictionary-encoded columns; dictionaries=<version> skips dictionaries the client already has
+                if fmt == 'columnar':
+                    if view != 'rows':
+                        self.send_json_error(400, 'format=columnar supports the row view only')
+                        return
+                    encoder = get_cached(self.get_db_path(), 'columnar_encoder', build_columnar_encoder)
+                    if filter_engine_enabled():
+                        engine = get_cached(self.get_db_path(), 'filter_engine', build_filter_engine)
+                        ids = engine.ids(*filters)
+                    else:
+                        conn = self.get_db_connection()
+                        where, query_params = self.build_problem_filters(*filters)
+                        ids = [row[0] for row in conn.execute(
+                            f'SELECT id FROM problems WHERE {where} ORDER BY company, difficulty, title', query_params)]
+                        conn.close()
+                    include_dictionaries = params.get('dictionaries', [''])[0] != str(encoder.version)
+                    self.send_json_bytes(encoder.encode(ids, include_dictionaries).encode('utf-8'))
+                    return
                 
-                if 'difficulty' in params and params['difficulty'][0] != 'all':
-                    query += ' AND difficulty = ?'
-                    query_params.append(params['difficulty'][0])
+                # Optional in-memory bitmap engine (DSA_FILTER_ENGINE=1)
+                if filter_engine_enabled() and view == 'rows':
+                    engine = get_cached(self.get_db_path(), 'filter_engine', build_filter_engine)
+                    self.send_json_bytes(engine.json_array(engine.positions(*filters)))
+                    return
                 
-                if 'search' in params and params['search'][0]:
-                    query += ' AND title LIKE ?'
-                    query_params.append(f"%{params['search'][0]}%")
+                conn = self.get_db_connection()
+                cursor = conn.cursor()
                 
-                query += ' ORDER BY company, difficulty, title'
+                # Build query with filters
+                if view == 'consolidated':
+                    # One row per company problem; a duration keeps problems present in that window
+                    company, duration, difficulty, search, topic = filters
+                    where, query_params = self.build_problem_filters(company, '5. All', difficulty, search, topic)
+                    if duration != '5. All':
+                        where += ' AND (windows & ?) != 0'
+                        query_params.append(window_bit(duration))
+                    query = f'SELECT json FROM consolidated_problems WHERE {where} ORDER BY company, difficulty, title'
+                else:
+                    where, query_params = self.build_problem_filters(*filters)
+                    query = f'SELECT json FROM problems WHERE {where} ORDER BY company, difficulty, title'
                 
+                # Rows carry their serialized JSON from import; the body is just a join
                 cursor.execute(query, query_params)
-                
-                # Convert rows to dictionaries
-                problems = []
-                for row in cursor.fetchall():
-                    problems.append({
-                        'id': row['id'],
-                        'company': row['company'],
-                        'duration': row['duration'],
-                        'difficulty': row['difficulty'],
-                        'title': row['title'],
-                        'frequency': row['frequency'],
-                        'acceptance_rate': row['acceptance_rate'],
-                        'link': row['link'],
-                        'topics': row['topics']
-                    })
+                body = '[' + ','.join(row[0] for row in cursor.fetchall()) + ']'
                 
                 conn.close()
                 
-                self.send_json_response(problems)
+                self.send_json_bytes(body.encode('utf-8'))
+            except ValueError as e:
+                self.send_json_error(400, str(e))
             except Exception as e:
                 print(f"Error in /api/problems: {e}")
                 traceback.print_exc()
                 self.send_error(500, f"Database error: {str(e)}")
             return
         
+        # API: Stream filtered problems as NDJSON or CSV (resume with after=<last id>)
+        elif path == '/api/export':
+            try:
+                params = parse_qs(parsed_url.query)
+                fmt = params.get('format', ['ndjson'])[0]
+                if fmt not in EXPORT_FORMATS:
+                    self.send_json_error(400, f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+                    return
+                try:
+                    after = int(params.get('after', ['0'])[0])
+                except ValueError:
+                    self.send_json_error(400, 'after must be a problem id')
+                    return
+                
+                where, query_params = self.build_problem_filters(
+                    params.get('company', ['all'])[0],
+                    params.get('duration', ['5. All'])[0],
+                    params.get('difficulty', ['all'])[0],
+                    params.get('search', [''])[0],
+                    params.get('topic', [''])[0]
+                )
+                
+                chunks = iter_export(self.get_db_connection(), where, query_params, fmt, after)
+                compressed = accepts_gzip(self.headers.get('Accept-Encoding'))
+                if compressed:
+                    chunks = gzip_stream(chunks)
+                
+                self.send_response(200)
+                self.send_header('Content-Type', EXPORT_FORMATS[fmt])
+                self.send_header('Content-Disposition', f'attachment; filename=problems.{fmt}')
+                self.send_header('Vary', 'Accept-Encoding')
+                if compressed:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                for chunk in chunks:
+                    self.wfile.write(chunk)
+            except Exception as e:
+                print(f"Error in /api/export: {e}")
+                traceback.print_exc()
+            return
+        
         # API: Get statistics
         elif path == '/api/stats':
             try:
@@ -190,12 +441,285 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
                 self.send_error(500, f"Database error: {str(e)}")
             return
         
+        # API: Get trending problems (risers and fallers between duration windows)
+        elif path == '/api/trends':
+            try:
+                params = parse_qs(parsed_url.query)
+                company = params.get('company', ['all'])[0]
+                try:
+                    limit = min(max(int(params.get('limit', ['20'])[0]), 1), 200)
+                except ValueError:
+                    limit = 20
+                
+                conn = self.get_db_connection()
+                cursor = conn.cursor()
+                
+                columns = 'title, difficulty, link, recent_frequency, baseline_frequency, delta, status'
+                cursor.execute(f'''
+                    SELECT {columns} FROM trends
+                    WHERE company = ? AND delta > 0
+                    ORDER BY delta DESC, title
+                    LIMIT ?
+                ''', (company, limit))
+                risers = [dict(row) for row in cursor.fetchall()]
+                
+                cursor.execute(f'''
+                    SELECT {columns} FROM trends
+                    WHERE company = ? AND delta < 0
+                    ORDER BY delta ASC, title
+                    LIMIT ?
+                ''', (company, limit))
+                fallers = [dict(row) for row in cursor.fetchall()]
+                
+                conn.close()
+                
+                self.send_json_response({'company': company, 'risers': risers, 'fallers': fallers})
+            except Exception as e:
+                print(f"Error in /api/trends: {e}")
+                traceback.print_exc()
+                self.send_error(500, f"Database error: {str(e)}")
+            return
+        
+        # API: Topic co-occurrence, company emphasis and difficulty mix (precomputed at import)
+        elif path == '/api/analytics/topics':
+            try:
+                params = parse_qs(parsed_url.query)
+                topic = params.get('topic', [''])[0] or None
+                company = params.get('company', [''])[0] or None
+                try:
+                    limit = min(max(int(params.get('limit', [str(TOPIC_LIMIT)])[0]), 1), MAX_TOPIC_LIMIT)
+                except ValueError:
+                    limit = TOPIC_LIMIT
+                
+                conn = self.get_db_connection()
+                try:
+                    analytics = topic_analytics(conn, topic, company, limit)
+                finally:
+                    conn.close()
+                
+                self.send_json_response(analytics)
+            except LookupError as e:
+                self.send_json_error(404, str(e))
+            except Exception as e:
+                print(f"Error in /api/analytics/topics: {e}")
+                traceback.print_exc()
+                self.send_error(500, f"Database error: {str(e)}")
+            return
+        
+        # API: Study plan across several companies (union / intersection / atleast=K)
+        elif path == '/api/plan':
+            try:
+                params = parse_qs(parsed_url.query)
+                companies = params.get('companies', [''])[0].split(',')
+                mode = params.get('mode', ['union'])[0]
+                duration = params.get('duration', ['5. All'])[0]
+                
+                index = get_cached(self.get_db_path(), 'plan_index', build_plan_index)
+                self.send_json_response(build_plan(index, [c.strip() for c in companies], mode, duration))
+            except ValueError as e:
+                self.send_json_error(400, str(e))
+            except Exception as e:
+                print(f"Error in /api/plan: {e}")
+                traceback.print_exc()
+                self.send_error(500, f"Database error: {str(e)}")
+            return
+        
+        # API: Catalog changes since a version (delta sync for client-side caches)
+        elif path == '/api/catalog/changes':
+            try:
+                params = parse_qs(parsed_url.query)
+                try:
+                    since = int(params.get('since', ['0'])[0])
+                except ValueError:
+                    self.send_json_error(400, 'since must be an integer version')
+                    return
+                
+                conn = self.get_db_connection()
+                cursor = conn.cursor()
+                
+                cursor.execute("SELECT key, value FROM catalog_meta WHERE key IN ('version', 'base_version')")
+                meta = {row['key']: int(row['value']) for row in cursor.fetchall()}
+                version = meta.get('version', 0)
+                
+                # Clients older than the database itself have to start over
+                reset = since < meta.get('base_version', 0)
+                if reset:
+                    cursor.execute('SELECT * FROM problems ORDER BY id')
+                    inserts = [self.problem_from_row(row) for row in cursor.fetchall()]
+                    updates = []
+                    deletes = []
+                else:
+                    cursor.execute('SELECT * FROM problems WHERE version > ? ORDER BY id', (since,))
+                    inserts = []
+                    updates = []
+                    for row in cursor.fetchall():
+                        target = inserts if row['created_version'] > since else updates
+                        target.append(self.problem_from_row(row))
+                    cursor.execute('SELECT id FROM problem_tombstones WHERE version > ? ORDER BY id', (since,))
+                    deletes = [row['id'] for row in cursor.fetchall()]
+                
+                conn.close()
+                
+                self.send_json_response({
+                    'version': version,
+                    'since': since,
+                    'reset': reset,
+                    'inserts': inserts,
+                    'updates': updates,
+                    'deletes': deletes
+                })
+            except Exception as e:
+                print(f"Error in /api/catalog/changes: {e}")
+                traceback.print_exc()
+                self.send_error(500, f"Database error: {str(e)}")
+            return
+        
+        # API: Autocomplete across problem titles, companies and topics
+        elif path == '/api/suggest':
+            try:
+                params = parse_qs(parsed_url.query)
+                query = params.get('q', [''])[0]
+                try:
+                    limit = int(params.get('limit', ['10'])[0])
+                except ValueError:
+                    limit = 10
+                
+                index = get_cached(self.get_db_path(), 'suggest_index', build_suggest_index)
+                self.send_json_response(index.suggest(query, limit))
+            except Exception as e:
+                print(f"Error in /api/suggest: {e}")
+                traceback.print_exc()
+                self.send_error(500, f"Database error: {str(e)}")
+            return
+        
+        # API: Random practice set weighted by frequency (solved problems excluded when signed in)
+        elif path == '/api/practice':
+            try:
+                params = parse_qs(parsed_url.query)
+                company = params.get('company', [''])[0]
+                duration = params.get('duration', ['5. All'])[0]
+                difficulty = params.get('difficulty', ['all'])[0]
+                try:
+                    n = int(params.get('n', [str(DEFAULT_SET_SIZE)])[0])
+                except ValueError:
+                    n = DEFAULT_SET_SIZE
+                if not company:
+                    self.send_json_error(400, 'company is required')
+                    return
+                
+                excluded = set()
+                index = get_cached(self.get_db_path(), 'practice_index', build_practice_index)
+                token = self.headers.get('Authorization', '').replace('Bearer ', '')
+                user_id = self.verify_session(token) if token else None
+                if user_id:
+                    conn = self.get_user_db_connection()
+                    excluded = index.solved_links(solved_problem_ids(conn, user_id))
+                    conn.close()
+                
+                problems = index.draw(company, duration, difficulty, n, excluded)
+                if problems is None:
+                    self.send_json_error(404, 'No problems for that company, duration and difficulty')
+                    return
+                self.send_json_response({
+                    'company': company,
+                    'duration': duration,
+                    'difficulty': difficulty,
+                    'problems': problems
+                })
+            except Exception as e:
+                print(f"Error in /api/practice: {e}")
+                traceback.print_exc()
+                self.send_error(500, f"Database error: {str(e)}")
+            return
+        
+        # API: Profiling status (arm routes with POST)
+        elif path == '/api/admin/profile':
+            if not self.profiler.authorized(self.headers.get('X-Profile-Token')):
+                self.send_json_error(404, 'Not found')
+            else:
+                self.send_json_response({'armed': self.profiler.status(), 'output_dir': self.profiler.output_dir})
+            return
+        
+        # API: Get the signed-in user's problem statuses
+        elif path == '/api/progress':
+            token = self.headers.get('Authorization', '').replace('Bearer ', '')
+            user_id = self.verify_session(token)
+            if not user_id:
+                self.send_json_error(401, 'Not authenticated')
+                return
+            try:
+                params = parse_qs(parsed_url.query)
+                conn = self.get_user_db_connection()
+                progress = load_progress(conn, user_id, params.get('company', [None])[0])
+                conn.close()
+                self.send_json_response(progress)
+            except Exception as e:
+                print(f"Error in /api/progress: {e}")
+                traceback.print_exc()
+                self.send_error(500, f"Database error: {str(e)}")
+            return
+        
+        # API: Solved problems due for spaced-repetition review
+        elif path == '/api/review/due':
+            token = self.headers.get('Authorization', '').replace('Bearer ', '')
+            user_id = self.verify_session(token)
+            if not user_id:
+                self.send_json_error(401, 'Not authenticated')
+                return
+            try:
+                params = parse_qs(parsed_url.query)
+                try:
+                    limit = int(params.get('limit', ['20'])[0])
+                except ValueError:
+                    limit = 20
+                conn = self.get_user_db_connection(attach_catalog=True)
+                due = due_reviews(conn, user_id, limit)
+                conn.close()
+                self.send_json_response(due)
+            except Exception as e:
+                print(f"Error in /api/review/due: {e}")
+                traceback.print_exc()
+                self.send_error(500, f"Database error: {str(e)}")
+            return
+        
+        # API: Leaderboards (board=overall|company|difficulty, value=<company or difficulty>)
+        elif path == '/api/leaderboard':
+            try:
+                params = parse_qs(parsed_url.query)
+                try:
+                    limit = int(params.get('limit', ['10'])[0])
+                except ValueError:
+                    limit = 10
+                token = self.headers.get('Authorization', '').replace('Bearer ', '')
+                user_id = self.verify_session(token) if token else None
+                
+                leaderboards = get_cached(self.get_db_path(), 'leaderboards', build_leaderboards)
+                conn = self.get_user_db_connection()
+                try:
+                    response = leaderboard_response(
+                        leaderboards, conn,
+                        params.get('board', ['overall'])[0],
+                        params.get('value', [''])[0],
+                        limit,
+                        user_id
+                    )
+                finally:
+                    conn.close()
+                self.send_json_response(response)
+            except ValueError as e:
+                self.send_json_error(400, str(e))
+            except Exception as e:
+                print(f"Error in /api/leaderboard: {e}")
+                traceback.print_exc()
+                self.send_error(500, f"Database error: {str(e)}")
+            return
+        
         # API: Check session validity
         elif path == '/api/check-session':
             token = self.headers.get('Authorization', '').replace('Bearer ', '')
             user_id = self.verify_session(token)
             if user_id:
-                conn = self.get_db_connection()
+                conn = self.get_user_db_connection()
                 cursor = conn.cursor()
                 cursor.execute('SELECT username FROM users WHERE id = ?', (user_id,))
                 user = cursor.fetchone()
@@ -205,15 +729,165 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
                 self.send_json_response({'valid': False})
             return
         
+        # Company pages prerendered at import are answered from memory
+        elif path == '/problems.html' and self.send_company_page(parsed_url.query):
+            return
+        
         # Serve static files
         return SimpleHTTPRequestHandler.do_GET(self)
     
-    def do_POST(self):
+    def route_POST(self):
         parsed_url = urlparse(self.path)
         path = parsed_url.path
         
+        if self.reject_if_rate_limited(path, parsed_url.query):
+            return
+        
+        try:
+            data = self.read_post_data()
+        except ValueError:
+            self.send_json_error(400, 'Request body must be valid JSON')
+            return
+        if not isinstance(data, dict):
+            self.send_json_error(400, 'Request body must be a JSON object')
+            return
+        
+        # API: Get several filtered problem lists in one round-trip
+        if path == '/api/problems/batch':
+            try:
+                data = self.read_post_data()
+                specs = data.get('queries') if isinstance(data, dict) else None
+                if not isinstance(specs, list) or not specs:
+                    self.send_json_error(400, 'queries must be a non-empty list')
+                    return
+                if len(specs) > MAX_BATCH_QUERIES:
+                    self.send_json_error(400, f'At most {MAX_BATCH_QUERIES} queries per batch')
+                    return
+                if not all(isinstance(spec, dict) for spec in specs):
+                    self.send_json_error(400, 'Each query must be an object')
+                    return
+                
+                filters = [(
+                    str(spec.get('company', 'all')),
+                    str(spec.get('duration', '5. All')),
+                    str(spec.get('difficulty', 'all')),
+                    str(spec.get('search', '')),
+                    str(spec.get('topic', ''))
+                ) for spec in specs]
+                
+                if filter_engine_enabled():
+                    engine = get_cached(self.get_db_path(), 'filter_engine', build_filter_engine)
+                    body = b','.join(engine.json_array(engine.positions(*f)) for f in filters)
+                    self.send_json_bytes(b'{"results":[' + body + b']}')
+                    return
+                
+                # One compound query; batch_index tags which spec each row answers
+                parts = []
+                query_params = []
+                for index, f in enumerate(filters):
+                    where, params = self.build_problem_filters(*f)
+                    parts.append(f'SELECT {index} AS batch_index, company, difficulty, title, id, json FROM problems WHERE {where}')
+                    query_params.extend(params)
+                query = ' UNION ALL '.join(parts) + ' ORDER BY batch_index, company, difficulty, title, id'
+                
+                conn = self.get_db_connection()
+                cursor = conn.cursor()
+                cursor.execute(query, query_params)
+                
+                # Same precomputed row fragments as the engine path, so both write identical bytes
+                results = [[] for _ in filters]
+                for row in cursor.fetchall():
+                    results[row['batch_index']].append(row['json'])
+                body = ','.join('[' + ','.join(fragments) + ']' for fragments in results).encode('utf-8')
+                
+                conn.close()
+                
+                self.send_json_bytes(b'{"results":[' + body + b']}')
+            except Exception as e:
+                print(f"Error in /api/problems/batch: {e}")
+                traceback.print_exc()
+                self.send_json_error(500, f"Database error: {str(e)}")
+            return
+        
+        # API: Arm profiling for the next N (or a sampled fraction of) requests to a route
+        elif path == '/api/admin/profile':
+            if not self.profiler.authorized(self.headers.get('X-Profile-Token')):
+                self.send_json_error(404, 'Not found')
+                return
+            try:
+                data = self.read_post_data()
+                route = data.get('route') if isinstance(data, dict) else None
+                if not route or not isinstance(route, str):
+                    self.send_json_error(400, 'route is required')
+                    return
+                self.profiler.arm(route, int(data.get('requests', 1)), float(data.get('sample_rate', 1.0)))
+                self.send_json_response({'armed': self.profiler.status(), 'output_dir': self.profiler.output_dir})
+            except (TypeError, ValueError):
+                self.send_json_error(400, 'requests and sample_rate must be numbers')
+            return
+        
+        # API: Update the signed-in user's status for one problem
+        elif path == '/api/progress':
+            token = self.headers.get('Authorization', '').replace('Bearer ', '')
+            user_id = self.verify_session(token)
+            if not user_id:
+                self.send_json_error(401, 'Not authenticated')
+                return
+            try:
+                data = self.read_post_data()
+                if not isinstance(data, dict):
+                    data = {}
+                conn = self.get_db_connection()
+                try:
+                    save_progress(self.write_queue, conn, user_id, data.get('problem_id'), data.get('status'))
+                finally:
+                    conn.close()
+                self.send_json_response({'success': True})
+            except ValueError as e:
+                self.send_json_error(400, str(e))
+            except (WriteQueueFull, TimeoutError) as e:
+                self.send_json_error(503, str(e), retry_after=1)
+            except Exception as e:
+                print(f"Error in /api/progress: {e}")
+                traceback.print_exc()
+                self.send_json_error(500, f"Database error: {str(e)}")
+            return
+        
+        # API: Grade a review (quality 0-5) and reschedule it
+        elif path.startswith('/api/review/'):
+            token = self.headers.get('Authorization', '').replace('Bearer ', '')
+            user_id = self.verify_session(token)
+            if not user_id:
+                self.send_json_error(401, 'Not authenticated')
+                return
+            problem_id = path[len('/api/review/'):]
+            if not problem_id.isdigit():
+                self.send_json_error(404, 'Not found')
+                return
+            try:
+                data = self.read_post_data()
+                if not isinstance(data, dict):
+                    data = {}
+                conn = self.get_user_db_connection()
+                try:
+                    schedule = record_review(self.write_queue, conn, user_id, int(problem_id), data.get('quality'))
+                finally:
+                    conn.close()
+                self.send_json_response(schedule)
+            except ValueError as e:
+                self.send_json_error(400, str(e))
+            except LookupError as e:
+                self.send_json_error(404, str(e))
+            except (WriteQueueFull, TimeoutError) as e:
+                self.send_json_error(503, str(e), retry_after=1)
+            except Exception as e:
+                print(f"Error in /api/review: {e}")
+                traceback.print_exc()
+                self.send_json_error(500, f"Database error: {str(e)}")
+            return
+        
         # API: User registration
-        if path == '/api/register':
+        elif path == '/api/register':
             try:
                 data = self.read_post_data()
                 username = data.get('username', '').strip()
@@ -236,23 +910,19 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
                 # Hash password
                 pwd_hash, salt = self.hash_password(password)
                 
-                # Insert user
-                conn = self.get_db_connection()
-                cursor = conn.cursor()
-                
+                # Insert user (group-committed by the write-behind queue)
                 try:
-                    cursor.execute('''
+                    self.write_queue.execute('''
                         INSERT INTO users (username, email, password_hash, salt)
                         VALUES (?, ?, ?, ?)
                     ''', (username, email, pwd_hash, salt))
-                    conn.commit()
-                    conn.close()
                     
                     self.send_json_response({'success': True, 'message': 'Registration successful'})
                 except sqlite3.IntegrityError:
-                    conn.close()
                     self.send_json_error(400, 'Username or email already exists')
                     
+            except (WriteQueueFull, TimeoutError, ServerBusy) as e:
+                self.send_json_error(503, str(e), retry_after=1)
             except Exception as e:
                 print(f"Error in /api/register: {e}")
                 traceback.print_exc()
@@ -271,7 +941,7 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
                     return
                 
                 # Get user
-                conn = self.get_db_connection()
+                conn = self.get_user_db_connection()
                 cursor = conn.cursor()
                 cursor.execute('SELECT id, password_hash, salt FROM users WHERE username = ?', (username,))
                 user = cursor.fetchone()
@@ -288,16 +958,16 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
                     self.send_json_error(401, 'Invalid username or password')
                     return
                 
-                # Create session
+                conn.close()
+                
+                # Create session (durable before the token is handed out)
                 token = secrets.token_urlsafe(32)
                 expires_at = datetime.now() + timedelta(days=7)
                 
-                cursor.execute('''
+                self.write_queue.execute('''
                     INSERT INTO sessions (user_id, token, expires_at)
                     VALUES (?, ?, ?)
                 ''', (user['id'], token, expires_at))
-                conn.commit()
-                conn.close()
                 
                 self.send_json_response({
                     'success': True,
@@ -305,6 +975,8 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
                     'username': username
                 })
                 
+            except (WriteQueueFull, TimeoutError, ServerBusy) as e:
+                self.send_json_error(503, str(e), retry_after=1)
             except Exception as e:
                 print(f"Error in /api/login: {e}")
                 traceback.print_exc()
@@ -323,18 +995,25 @@ class DSAServerHandler(SimpleHTTPRequestHandler):
         self.end_headers()
 
 def run_server(port=8000):
-    # Check if database exists
+    # Check if the catalog and user databases exist
     db_path = os.path.join(os.getcwd(), 'dsa_problems.db')
-    if not os.path.exists(db_path):
+    user_db_path = os.environ.get('DSA_USER_DB', os.path.join(os.getcwd(), 'dsa_users.db'))
+    missing = [path for path in (db_path, user_db_path) if not os.path.exists(path)]
+    if missing:
         print("=" * 70)
         print("❌ Database not found!")
         print("=" * 70)
-        print(f"Looking for: {db_path}")
-        print("Please run the database initialization script first:")
+        for path in missing:
+            print(f"Looking for: {path}")
+        print("Please run the database initialization scripts first:")
         print("  python init_database.py")
+        print("  python init_auth.py")
         print("=" * 70)
         return
     
+    # Session, registration and progress writes are group-committed by one writer thread
+    DSAServerHandler.write_queue = WriteBehindQueue(user_db_path)
+    
     server_address = ('', port)
     httpd = HTTPServer(server_address, DSAServerHandler)
     
@@ -343,7 +1022,7 @@ def run_server(port=8000):
     print("=" * 70)
     print(f"✅ Server running at: http://localhost:{port}")
     print(f"📂 Serving from: {os.getcwd()}")
-    print(f"💾 Using database: dsa_problems.db")
+    print(f"💾 Using databases: dsa_problems.db (catalog, read-only), {user_db_path} (users)")
     print(f"🌐 Open http://localhost:{port} in your browser")
     print("\n⚠️  Press Ctrl+C to stop the server")
     print("=" * 70)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Multi-Company Study Plans
+Each company's problem set is kept as a bitset (a Python int) over canonical
+problem ids, so unions, intersections and "at least k of n" counts are
+word-level bit operations instead of SQL self-joins
+"""
+
+class PlanIndex:
+    """Bitsets and frequencies per (company, duration) over canonical problem ids"""
+
+    def __init__(self, problems, bitsets, frequencies):
+        self.problems = problems        # canonical id -> problem dict
+        self.bitsets = bitsets          # (company, duration) -> int bitset
+        self.frequencies = frequencies  # (company, duration) -> {canonical id: frequency}
+        self.companies = {company for company, _ in bitsets}
+        self.durations = {duration for _, duration in bitsets}
+
+def build_plan_index(conn):
+    """Build the plan index from the problems table"""
+    cursor = conn.cursor()
+
+    # Canonical ids are assigned per distinct problem link, in title order
+    cursor.execute('''
+        SELECT link, MIN(title) AS title, MIN(difficulty) AS difficulty,
+               MAX(acceptance_rate) AS acceptance_rate, MAX(topics) AS topics
+        FROM problems
+        GROUP BY link
+        ORDER BY title, link
+    ''')
+    problems = []
+    canonical_ids = {}
+    for row in cursor.fetchall():
+        canonical_ids[row['link']] = len(problems)
+        problems.append({
+            'id': len(problems),
+            'title': row['title'],
+            'difficulty': row['difficulty'],
+            'acceptance_rate': row['acceptance_rate'],
+            'link': row['link'],
+            'topics': row['topics']
+        })
+
+    positions = {}
+    frequencies = {}
+    cursor.execute('SELECT company, duration, link, frequency FROM problems')
+    for row in cursor.fetchall():
+        key = (row['company'], row['duration'])
+        pid = canonical_ids[row['link']]
+        positions.setdefault(key, []).append(pid)
+        frequencies.setdefault(key, {})[pid] = row['frequency'] or 0.0
+
+    bitsets = {key: bitmap_from_positions(pids, len(problems)) for key, pids in positions.items()}
+    return PlanIndex(problems, bitsets, frequencies)
+
+def parse_mode(mode, company_count):
+    """Parse 'union', 'intersection' or 'atleast=K' into a minimum company count"""
+    mode = (mode or 'union').strip().lower()
+    if mode == 'union':
+        return 1
+    if mode == 'intersection':
+        return company_count
+    if mode.startswith('atleast'):
+        try:
+            k = int(mode[len('atleast'):].lstrip('=:'))
+        except ValueError:
+            raise ValueError("mode must be 'union', 'intersection' or 'atleast=K'")
+        if k < 1 or k > company_count:
+            raise ValueError(f'atleast must be between 1 and {company_count}')
+        return k
+    raise ValueError("mode must be 'union', 'intersection' or 'atleast=K'")
+
+def at_least(bitsets, k):
+    """Bits set in at least k of the given bitsets, via a bit-sliced counter"""
+    # slices[i] holds bit i of each position's count
+    slices = []
+    for bits in bitsets:
+        carry = bits
+        for i in range(len(slices)):
+            if not carry:
+                break
+            slices[i], carry = slices[i] ^ carry, slices[i] & carry
+        if carry:
+            slices.append(carry)
+
+    if k > (1 << len(slices)) - 1:
+        return 0
+
+    # Compare each count against k from the most significant slice down
+    universe = 0
+    for bits in bitsets:
+        universe |= bits
+    greater = 0
+    equal = universe
+    for i in range(len(slices) - 1, -1, -1):
+        if (k >> i) & 1:
+            equal &= slices[i]
+        else:
+            greater |= equal & slices[i]
+            equal &= ~slices[i]
+    return greater | equal
+
+def bitmap_from_positions(positions, size):
+    """Build an int bitset with the given bit positions set"""
+    buffer = bytearray((size + 7) // 8)
+    for pos in positions:
+        buffer[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buffer, 'little')
+
+def iter_bits(bits):
+    """Return set bit positions in ascending order"""
+    digits = bin(bits)[:1:-1]  # least significant bit first, '0b' dropped
+    return [i for i, digit in enumerate(digits) if digit == '1']
+
+def build_plan(index, companies, mode='union', duration='5. All'):
+    """Return the ranked, deduplicated problem list for several companies"""
+    companies = list(dict.fromkeys(c for c in companies if c))
+    if not companies:
+        raise ValueError('At least one company is required')
+
+    missing = [company for company in companies if company not in index.companies]
+    if missing:
+        raise ValueError(f"Unknown company: {', '.join(missing)}")
+    if duration not in index.durations:
+        raise ValueError(f"Unknown duration: {duration}")
+
+    # A company with no list for this window contributes an empty set
+    keys = [(company, duration) for company in companies]
+    k = parse_mode(mode, len(companies))
+    bitsets = [index.bitsets.get(key, 0) for key in keys]
+    if k == 1:
+        selected = 0
+        for bits in bitsets:
+            selected |= bits
+    elif k == len(bitsets):
+        selected = bitsets[0]
+        for bits in bitsets[1:]:
+            selected &= bits
+    else:
+        selected = at_least(bitsets, k)
+
+    frequency_maps = [index.frequencies.get(key, {}) for key in keys]
+    problems = []
+    for pid in iter_bits(selected):
+        total = 0.0
+        count = 0
+        for frequencies in frequency_maps:
+            frequency = frequencies.get(pid)
+            if frequency is not None:
+                total += frequency
+                count += 1
+        problem = dict(index.problems[pid])
+        problem['frequency'] = round(total, 4)
+        problem['companies'] = count
+        problems.append(problem)
+
+    problems.sort(key=lambda p: (-p['frequency'], p['title']))
+    return {
+        'companies': companies,
+        'mode': mode,
+        'duration': duration,
+        'count': len(problems),
+        'problems': problems
+    }
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Search Suggestions
+Prefix index over problem titles, company names and topics for /api/suggest.
+Every word start of each name is a key in one sorted array; the top
+completions for short (hot) prefixes are precomputed, and longer prefixes
+cover ranges small enough to rank on the fly.
+"""
+
+import heapq
+from bisect import bisect_left
+from catalog_snapshot import split_topics
+
+TOP_K = 10
+HOT_PREFIX_LENGTH = 3
+
+class SuggestIndex:
+    """Sorted prefix keys with precomputed top-K lists for short prefixes"""
+
+    def __init__(self, entries):
+        # entries: (key, weight, kind, text); one per word start of each name
+        entries.sort(key=lambda entry: entry[0])
+        self.keys = [entry[0] for entry in entries]
+        self.items = [(entry[1], entry[2], entry[3]) for entry in entries]
+
+        buckets = {}
+        for i, key in enumerate(self.keys):
+            for length in range(1, min(HOT_PREFIX_LENGTH, len(key)) + 1):
+                buckets.setdefault(key[:length], []).append(i)
+        self.hot = {prefix: self._rank(indexes, TOP_K) for prefix, indexes in buckets.items()}
+
+    def _rank(self, indexes, limit):
+        """Highest-weight distinct suggestions among the given entry indexes"""
+        ranked = sorted((self.items[i] for i in indexes), key=lambda item: (-item[0], item[2]))
+        results = []
+        seen = set()
+        for weight, kind, text in ranked:
+            if (kind, text) in seen:
+                continue
+            seen.add((kind, text))
+            results.append({'text': text, 'type': kind, 'weight': weight})
+            if len(results) == limit:
+                break
+        return results
+
+    def suggest(self, query, limit=TOP_K):
+        """Top completions for a prefix, ranked by aggregate frequency"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        limit = max(1, min(limit, TOP_K))
+        if prefix in self.hot:
+            return self.hot[prefix][:limit]
+        if len(prefix) <= HOT_PREFIX_LENGTH:
+            return []  # every existing short prefix is in the hot table
+
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\uffff', lo)
+        # A name can match at several word starts, so over-fetch before de-duplicating
+        candidates = heapq.nlargest(limit * 4, range(lo, hi), key=lambda i: self.items[i][0])
+        return self._rank(candidates, limit)
+
+def normalize(text):
+    """Lowercase and collapse whitespace"""
+    return ' '.join((text or '').lower().split())
+
+def word_keys(text):
+    """Keys for every word start of a name ('two sum' -> 'two sum', 'sum')"""
+    words = normalize(text).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+def build_suggest_index(conn):
+    """Aggregate frequencies from the '5. All' window and build the prefix index"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT company, title, frequency, topics
+        FROM problems
+        WHERE duration = '5. All'
+    ''')
+
+    weights = {}
+    for company, title, frequency, topics in cursor.fetchall():
+        frequency = frequency or 0.0
+        for kind, text in [('title', title), ('company', company)] + [('topic', t) for t in split_topics(topics)]:
+            weights[(kind, text)] = weights.get((kind, text), 0.0) + frequency
+
+    entries = []
+    for (kind, text), weight in weights.items():
+        for key in word_keys(text):
+            entries.append((key, round(weight, 1), kind, text))
+    return SuggestIndex(entries)
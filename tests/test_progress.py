@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Progress Writes
+A status change, its progress event and its review entry commit as one
+write-behind unit: if any statement fails, none of them is written.
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import init_auth
+from progress import save_progress
+from write_behind import WriteBehindQueue
+
+class SaveProgressTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.user_db = os.path.join(directory, 'dsa_users.db')
+        with mock.patch.object(init_auth, 'USER_DB', self.user_db), \
+                mock.patch.object(init_auth, 'CATALOG_DB', os.path.join(directory, 'missing.db')), \
+                mock.patch('builtins.print'):
+            init_auth.init_auth_tables()
+
+        self.catalog = sqlite3.connect(':memory:')
+        self.addCleanup(self.catalog.close)
+        self.catalog.execute('CREATE TABLE problems (id INTEGER PRIMARY KEY, company TEXT)')
+        self.catalog.execute("INSERT INTO problems VALUES (7, 'Google')")
+        self.write_queue = WriteBehindQueue(self.user_db)
+
+    def count(self, table):
+        conn = sqlite3.connect(self.user_db)
+        try:
+            return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_writes_status_event_and_review(self):
+        event_id = save_progress(self.write_queue, self.catalog, 1, 7, 'solved')
+        self.assertEqual(event_id, 1)
+        self.assertEqual(self.count('user_progress'), 1)
+        self.assertEqual(self.count('progress_events'), 1)
+        self.assertEqual(self.count('review_schedule'), 1)
+
+    def test_failed_event_insert_writes_nothing(self):
+        conn = sqlite3.connect(self.user_db)
+        conn.execute('''
+            CREATE TRIGGER fail_event BEFORE INSERT ON progress_events
+            BEGIN SELECT RAISE(ABORT, 'event insert failed'); END
+        ''')
+        conn.commit()
+        conn.close()
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            save_progress(self.write_queue, self.catalog, 1, 7, 'solved')
+        self.assertEqual(self.count('user_progress'), 0)
+        self.assertEqual(self.count('progress_events'), 0)
+        self.assertEqual(self.count('review_schedule'), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Rate Limiting Behind a Proxy
+Clients forwarded by a trusted proxy must be limited separately, not share
+the proxy's bucket.
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+from rate_limit import RateLimiter, client_ip
+
+PROXY = '10.0.0.5'
+CLIENT_A = '203.0.113.7'
+CLIENT_B = '198.51.100.9'
+
+class TrustedProxyTest(unittest.TestCase):
+    def setUp(self):
+        environ = {key: value for key, value in os.environ.items() if not key.startswith('DSA_RATE')}
+        environ['DSA_TRUSTED_PROXIES'] = '10.0.0.0/8'
+        patcher = mock.patch.dict(os.environ, environ, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_client_ip_reads_forwarded_for_from_trusted_proxy(self):
+        self.assertEqual(client_ip(PROXY, CLIENT_A), CLIENT_A)
+        self.assertEqual(client_ip(PROXY, f'{CLIENT_B}, 10.0.0.9'), CLIENT_B)
+        self.assertEqual(client_ip('192.0.2.1', CLIENT_A), '192.0.2.1')
+
+    def test_forwarded_clients_get_separate_buckets(self):
+        limiter = RateLimiter(limits={'auth': (2, 0.001)})
+        with mock.patch.object(app, 'rate_limiter', limiter):
+            client = app.app.test_client()
+
+            def login(forwarded_for):
+                return client.post('/api/login', json={},
+                                   environ_base={'REMOTE_ADDR': PROXY},
+                                   headers={'X-Forwarded-For': forwarded_for})
+
+            self.assertEqual([login(CLIENT_A).status_code for _ in range(3)], [400, 400, 429])
+            self.assertEqual(login(CLIENT_B).status_code, 400)
+            self.assertEqual(login(CLIENT_A).status_code, 429)
+
+    def test_untrusted_peer_shares_one_bucket(self):
+        limiter = RateLimiter(limits={'auth': (2, 0.001)})
+        with mock.patch.dict(os.environ, {'DSA_TRUSTED_PROXIES': ''}), \
+                mock.patch.object(app, 'rate_limiter', limiter):
+            client = app.app.test_client()
+            for forwarded_for, status in ((CLIENT_A, 400), (CLIENT_B, 400), (CLIENT_A, 429), (CLIENT_B, 429)):
+                response = client.post('/api/login', json={},
+                                       environ_base={'REMOTE_ADDR': PROXY},
+                                       headers={'X-Forwarded-For': forwarded_for})
+                self.assertEqual(response.status_code, status)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Topic Analytics
+Builds a problem x topic incidence matrix once per import and derives three
+tables from it by sparse matrix products: topic x topic co-occurrence
+(MᵀM), topic x company weight (MᵀC) and topic x difficulty counts (MᵀD).
+A problem is a distinct link across all companies; company weights use the
+problem's highest frequency in any duration window. /api/analytics/topics
+reads the stored tables and never recomputes them.
+"""
+
+import json
+from catalog_snapshot import split_topics
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+def transpose_product(rows):
+    """Sparse MᵀN: rows are (topic indexes of M, {column: weight} of N) pairs"""
+    product = {}
+    for topics, weights in rows:
+        for topic in topics:
+            for column, weight in weights.items():
+                key = (topic, column)
+                product[key] = product.get(key, 0) + weight
+    return product
+
+def compute_topic_analytics(conn):
+    """Rebuild the topic_* tables from consolidated_problems"""
+    cursor = conn.cursor()
+    for table in ('topic_stats', 'topic_cooccurrence', 'topic_companies', 'topic_difficulty'):
+        cursor.execute(f'DELETE FROM {table}')
+
+    cursor.execute('SELECT company, link, difficulty, topics, json FROM consolidated_problems ORDER BY link, company')
+    topic_index = {}
+    problems = {}   # link -> (topic indexes, difficulty, acceptance rate)
+    companies = {}  # link -> {company: weight}
+    for company, link, difficulty, topics, data in cursor.fetchall():
+        entry = json.loads(data)
+        if link not in problems:
+            indexes = sorted({topic_index.setdefault(t, len(topic_index)) for t in split_topics(topics)})
+            problems[link] = (indexes, difficulty, entry.get('acceptance_rate'))
+        frequencies = [f for f in entry['frequencies'] if f is not None]
+        companies.setdefault(link, {})[company] = max(frequencies) if frequencies else 0.0
+    topics = sorted(topic_index, key=topic_index.get)
+
+    links = list(problems)
+    incidence = [problems[link][0] for link in links]
+    cooccurrence = transpose_product(
+        (indexes, {other: 1 for other in indexes}) for indexes in incidence)
+    company_weight = transpose_product(zip(incidence, (companies[link] for link in links)))
+    company_count = transpose_product(
+        (indexes, dict.fromkeys(companies[link], 1)) for indexes, link in zip(incidence, links))
+    difficulty_count = transpose_product(
+        (problems[link][0], {problems[link][1]: 1}) for link in links)
+    acceptance = transpose_product(
+        (problems[link][0], {'sum': problems[link][2], 'n': 1}) for link in links
+        if problems[link][2] is not None)
+
+    topic_companies = [0] * len(topics)
+    for t, _ in company_count:
+        topic_companies[t] += 1
+    stats = []
+    for i, topic in enumerate(topics):
+        rated = acceptance.get((i, 'n'), 0)
+        # Diagonal of MᵀM is each topic's problem count
+        stats.append((topic, cooccurrence.get((i, i), 0), topic_companies[i],
+                      round(acceptance[(i, 'sum')] / rated, 4) if rated else None))
+    cursor.executemany('''
+        INSERT INTO topic_stats (topic, problems, companies, avg_acceptance_rate)
+        VALUES (?, ?, ?, ?)
+    ''', stats)
+
+    # Both directions are stored so one topic's partners are a single index range
+    cursor.executemany('''
+        INSERT INTO topic_cooccurrence (topic, other_topic, problems, jaccard)
+        VALUES (?, ?, ?, ?)
+    ''', [(topics[a], topics[b], n, round(n / (cooccurrence[(a, a)] + cooccurrence[(b, b)] - n), 4))
+          for (a, b), n in cooccurrence.items() if a != b])
+
+    cursor.executemany('''
+        INSERT INTO topic_companies (topic, company, problems, weight)
+        VALUES (?, ?, ?, ?)
+    ''', [(topics[t], company, company_count[(t, company)], round(weight, 2))
+          for (t, company), weight in company_weight.items()])
+
+    cursor.executemany('''
+        INSERT INTO topic_difficulty (topic, difficulty, problems)
+        VALUES (?, ?, ?)
+    ''', [(topics[t], difficulty, n) for (t, difficulty), n in difficulty_count.items()])
+    conn.commit()
+
+    print(f"✓ Topic analytics: {len(topics)} topics over {len(links)} problems, "
+          f"{len(cooccurrence) - len(topics)} co-occurring pairs")
+    return len(topics)
+
+def topic_analytics(conn, topic=None, company=None, limit=DEFAULT_LIMIT):
+    """Stored analytics; co-occurrence and company lists narrow to topic/company when given"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT topic, problems, companies, avg_acceptance_rate FROM topic_stats ORDER BY problems DESC, topic')
+    topics = [dict(row) for row in cursor.fetchall()]
+    by_topic = {entry['topic']: entry for entry in topics}
+    if topic is not None and topic not in by_topic:
+        raise LookupError(f"Unknown topic: {topic}")
+
+    for entry in topics:
+        entry['difficulty'] = {}
+    cursor.execute('SELECT topic, difficulty, problems FROM topic_difficulty ORDER BY topic, difficulty')
+    for name, difficulty, problems in cursor.fetchall():
+        by_topic[name]['difficulty'][difficulty] = problems
+
+    if topic is None:
+        cursor.execute('''
+            SELECT topic, other_topic, problems, jaccard FROM topic_cooccurrence
+            WHERE topic < other_topic
+            ORDER BY problems DESC, topic, other_topic
+            LIMIT ?
+        ''', (limit,))
+    else:
+        cursor.execute('''
+            SELECT topic, other_topic, problems, jaccard FROM topic_cooccurrence
+            WHERE topic = ?
+            ORDER BY problems DESC, other_topic
+            LIMIT ?
+        ''', (topic, limit))
+    cooccurrence = [dict(row) for row in cursor.fetchall()]
+
+    where, params = [], []
+    if topic is not None:
+        where.append('topic = ?')
+        params.append(topic)
+    if company is not None:
+        where.append('company = ?')
+        params.append(company)
+    cursor.execute(f'''
+        SELECT topic, company, problems, weight FROM topic_companies
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY weight DESC, topic, company
+        LIMIT ?
+    ''', params + [limit])
+    company_topics = [dict(row) for row in cursor.fetchall()]
+
+    return {'topics': topics, 'cooccurrence': cooccurrence, 'companies': company_topics}
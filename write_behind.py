@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Write-Behind Queue with Group Commit
+Request threads submit small writes (sessions, registrations, progress) and
+get a handle back; one writer thread per process drains the queue and commits
+everything pending in a single transaction every few milliseconds or every N
+items, so a burst of writes costs one fsync instead of one per request.
+Statements that must land together are submitted as one unit and applied
+all-or-nothing inside the group transaction.
+"""
+
+import os
+import time
+import queue
+import sqlite3
+import threading
+
+WRITE_TIMEOUT = 5.0  # seconds a request waits to enqueue, and again for its commit
+
+class WriteQueueFull(Exception):
+    """Raised when the queue stays full past the submit timeout (back-pressure)"""
+
+class WriteHandle:
+    """Completion handle for one queued write"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._result = None
+        self._error = None
+
+    def _finish(self, result=None, error=None):
+        self._result = result
+        self._error = error
+        self._event.set()
+
+    def done(self):
+        """Whether the write has been committed or has failed"""
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """Wait until the write is durable; return its lastrowid or raise its error"""
+        if not self._event.wait(timeout):
+            raise TimeoutError('Write is still pending, try again shortly')
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+class WriteBehindQueue:
+    """Bounded queue of writes committed in groups by a background thread"""
+
+    def __init__(self, db_path, max_batch=64, max_delay=0.005, max_pending=1024):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, sql, params=(), timeout=WRITE_TIMEOUT):
+        """Queue one statement; blocks up to timeout while the queue is full"""
+        return self.submit_unit([(sql, params)], timeout)
+
+    def submit_unit(self, statements, timeout=WRITE_TIMEOUT):
+        """Queue (sql, params) pairs that commit together or not at all; the result is the last lastrowid"""
+        self._ensure_writer()
+        handle = WriteHandle()
+        try:
+            self._queue.put(([(sql, tuple(params)) for sql, params in statements], handle), timeout=timeout)
+        except queue.Full:
+            raise WriteQueueFull('Too many pending writes, try again shortly')
+        return handle
+
+    def execute(self, sql, params=(), timeout=WRITE_TIMEOUT):
+        """Submit a write and wait for it to be committed"""
+        return self.submit(sql, params, timeout).result(timeout)
+
+    def _ensure_writer(self):
+        # Started lazily, and again after a fork (gunicorn workers), since threads don't survive fork
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                if self._pid is not None and self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        conn = None
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                if conn is None:
+                    conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+                self._commit(conn, batch)
+            except Exception as e:
+                # Never let the writer die: fail this batch and reconnect for the next one
+                print(f"Write-behind batch failed: {e}")
+                for _, handle in batch:
+                    if not handle.done():
+                        handle._finish(error=e)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except sqlite3.Error:
+                        pass
+                    conn = None
+
+    def _commit(self, conn, batch):
+        """Run a batch in one transaction; a failing statement only fails (and undoes) its own unit"""
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for statements, handle in batch:
+                conn.execute('SAVEPOINT item')
+                try:
+                    for sql, params in statements:
+                        cursor = conn.execute(sql, params)
+                    outcomes.append((handle, cursor.lastrowid, None))
+                    conn.execute('RELEASE item')
+                except sqlite3.Error as e:
+                    conn.execute('ROLLBACK TO item')
+                    conn.execute('RELEASE item')
+                    outcomes.append((handle, None, e))
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, handle in batch:
+                handle._finish(error=e)
+            return
+
+        for handle, result, error in outcomes:
+            handle._finish(result, error)